@@ -1,18 +1,187 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-from genericpath import isfile
-import os,sys
-import dateparser
+import os
 import re
 import json
 import codecs
-import jellyfish
-from py_pdf_parser import loaders
-from py_pdf_parser.components import PDFDocument
-from py_pdf_parser.exceptions import PDFParserError
-from typing import Union#, Tuple
+import time
+import logging
+import weakref
+import threading
+from bisect import bisect_right
+from functools import partial
+from contextlib import contextmanager
+from typing import Union, Iterable, Iterator, Callable, TYPE_CHECKING
 from datetime import datetime
+from .documents import load_first_page, iter_page_texts, page_text, file_key, outline, HEADER
+from .dates import parse_jo_date
+from .manifest import Manifest, file_digest
+from .storage import JSONStorage, SQLiteStorage
+from .records import PersonRecord, NaturalizedStore
+from .metrics import metrics, timed, written
+from .locking import ResultsLock, atomic_write
+# dateparser and the pdf libraries are long to import, they are only imported
+# when a pdf file is actually read (fast start of the lookups).
+if TYPE_CHECKING:
+    import asyncio
+    from .analytics import RecordTable
+    from py_pdf_parser.components import PDFDocument
+
+# All the series published every year (54 regular series + special ones)
+SERIES = [f'{ser:03}' for ser in list(range(0,55))+[300,301,302,303,304,305]]
+# Version of the persons parser, to be increased whenever the parsing of the
+# decree string changes (the persons of all known JOs are then parsed again)
+PARSER_VERSION = "3"
+# Version of the title page probe, to be increased whenever the classification
+# of the JOs changes (the JOs without naturalization are then probed again)
+PROBE_VERSION = "1"
+# Define the pattern to look for the person
+PATTERN_PERSON = re.compile(r"([A-Z\-\s]*\s\(([a-z-A-Z\s\,\-À-ÿ\’]*){1,9}\)\,)(.*?)(\,\sdpt\s[0-9]{2,3}|\,\sdép\.\s[0-9]{2,3}){1}", re.UNICODE)
+# Define the pattern to look for the first decree after the first page
+PATTERN_FIRST = re.compile(r"(Décret\sdu)(.*?)(\sNOR){1}", re.UNICODE)
+# Number of characters kept between pages to find the end of the decrees
+TAIL = 200
+# Patterns of the text following the last naturalization decree, by kind of
+# end marker found on the title page (see Reader.get_end_marker)
+END_MARKERS = {"modificatif":r"Décret modificatif du",
+               "rapportant":r"rapportant un décret de naturalisation",
+               "annonces":r"Les annonces sont reçues à la direction de l’information légale et administrative",
+               "issn":r"ISSN\s[0-9]*\-{0,1}[0-9]*"}
+# Texts of the title page classifying a JO (see FirstPageInfo): heading of the
+# naturalizations, naturalization decree, modifying decree, decree revoking a
+# naturalization and announcements
+FIRST_PAGE_MARKERS = {"heading":r"Naturalisations et réintégrations",
+                      "naturalisation":r"portant naturalisation",
+                      "modificatif":r"Décret modificatif du",
+                      "rapportant":r"rapportant un décret de naturalisation",
+                      "annonces":r"Annonces"}
+# Define the pattern finding all the texts of the title page in one pass
+PATTERN_FIRST_PAGE = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind,pattern in FIRST_PAGE_MARKERS.items()), re.UNICODE)
+# Define the pattern giving the year, series and dossier number of a person
+PATTERN_DOSSIER = re.compile(r"\),\sNAT,\s([0-9]{4})X\s([0-9]{3})([^,]*)", re.UNICODE)
+# Define the pattern of a dossier number as given to a person (e.g. 2020X 027123)
+PATTERN_DOSSIER_NUMBER = re.compile(r"(?:([0-9]{4})X\s?)?([0-9]{3})([0-9]+)", re.UNICODE)
+# Define the pattern giving all the fields of a person in one pass (a person
+# matches as with PATTERN_PERSON, birth and dossier are only found if written
+# as usual, see parse_person_records)
+PATTERN_RECORD = re.compile(r"(?P<name>[A-Z\-\s]*\s\([a-z-A-Z\s\,\-À-ÿ\’]*\))\,"
+                            r"(?: née? le (?P<birth_date>[0-9]{2}/[0-9]{2}/[0-9]{4}) à (?P<birthplace>[^()]*)\((?P<country>[^()]*(?:\([^()]*\)[^()]*)*)\)"
+                            r"(?:, NAT, (?P<year>[0-9]{4})X (?P<serie>[0-9]{3})(?P<dossier>[^,]*))?)?"
+                            r".*?\,\s(?:dpt|dép\.)\s(?P<dep>[0-9]{2,3})", re.UNICODE)
+# Tries to load a consistent snapshot of results written by other Readers
+REFRESH_TRIES = 3
+# Dates of the pdf files already probed, by file version (see documents.file_key)
+_dates = {}
+# Title page information of the documents already analysed (see FirstPageInfo.from_pdf)
+_first_pages = weakref.WeakKeyDictionary()
+
+logger = logging.getLogger(__name__)
+
+class FirstPageInfo:
+    """The classification of a JO from the texts of its title page."""
+    __slots__ = ("text","decrees","end","markers")
+    def __init__(self, text:str, decrees:int, end:str, markers:dict):
+        """Initialize the title page information (see .from_elements to analyse a title page)
+
+        Arguments
+        ----------
+        text : str, required.
+            Text of the title page on a single line (see documents.page_text).
+
+        decrees : int, required.
+            Number of naturalization decrees listed under the heading of the
+            naturalizations (0 if no heading).
+
+        end : str, required.
+            Kind of end marker of the decrees (key of END_MARKERS, see
+            Reader.get_end_marker).
+
+        markers : dict, required.
+            Position in text of the first occurrence of each text of
+            FIRST_PAGE_MARKERS found.
+        """
+        self.text = text
+        self.decrees = decrees
+        self.end = end
+        self.markers = markers
+
+    def __repr__(self) -> str:
+        return f"FirstPageInfo(decrees={self.decrees!r}, end={self.end!r}, markers={self.markers!r})"
+
+    @classmethod
+    def from_pdf(cls, pdf:"PDFDocument") -> "FirstPageInfo":
+        """Get the information of the title page of a loaded pdf (analysed once per document, see .from_elements)."""
+        info = _first_pages.get(pdf)
+        if info is None:
+            with metrics.stage("decree_count"):
+                info = _first_pages[pdf] = cls.from_elements(pdf.get_page(1).elements)
+        return info
+
+    @classmethod
+    def from_elements(cls, elements:Iterable) -> "FirstPageInfo":
+        """Analyse the text elements of a title page in a single pass.
+
+        The text of each element is normalized once, and all the texts of
+        FIRST_PAGE_MARKERS are found with one combined pattern over the text of
+        the page. Each occurrence is also given to its element, to count the
+        decrees listed between the heading of the naturalizations and the
+        announcements.
+
+        Arguments
+        ----------
+        elements : Iterable, required.
+            Text elements of the title page, ordered from top to bottom and
+            left to right (as ordered by py_pdf_parser).
+
+        Returns
+        -------
+        FirstPageInfo:
+            Information of the title page.
+
+
+        Example
+        -------
+        >>> FirstPageInfo.from_elements(pdf.get_page(1).elements)
+        FirstPageInfo(decrees=2, end='annonces', markers={'heading': 42, 'naturalisation': 114, 'annonces': 236})
+        """
+        texts = [" ".join(ele.text().split()) for ele in elements]
+        joined = " ".join(texts)
+        text = joined.split(HEADER)[-1]
+        # Start of the text of the page (without running title), and of each element
+        cut = len(joined)-len(text)
+        starts,start = [],0
+        for element_text in texts:
+            starts.append(start)
+            start += len(element_text)+1
+        markers = {}
+        found = [set() for _ in texts]
+        for match in PATTERN_FIRST_PAGE.finditer(joined):
+            kind = match.lastgroup
+            if match.start() >= cut:
+                markers.setdefault(kind,match.start()-cut)
+            i = bisect_right(starts,match.start())-1
+            if match.end() <= starts[i]+len(texts[i]):
+                found[i].add(kind)
+        # Decrees listed after the heading, until the announcements
+        heading = next((i for i,kinds in enumerate(found) if "heading" in kinds),None)
+        if heading is None:
+            decrees = 0
+        else:
+            annonces = next((i for i in range(heading+1,len(found)) if "annonces" in found[i]),len(found))
+            decrees = sum(1 for i in range(heading+1,annonces) if "naturalisation" in found[i])
+        # Depending on the title page, the naturalization decrees are followed
+        # by a modifying decree, a decree revoking a naturalization, the
+        # announcements or the end of the JO
+        if ("modificatif" in markers) and (markers["modificatif"] > markers.get("naturalisation",-1)):
+            end = "modificatif"
+        elif ("rapportant" in markers) and ("modificatif" not in markers):
+            end = "rapportant"
+        elif "annonces" in markers:
+            end = "annonces"
+        else:
+            end = "issn"
+        return cls(text,decrees,end,markers)
 
 class Reader:
     """The PDF reader object needed to read pdfs."""
@@ -28,6 +197,11 @@ class Reader:
         To see all the latest JOs published, it is highly recommended to take a look at:
         https://www.easytrangers.com/t/liste-des-decrets-de-naturalisation-2021/6199
 
+        Several Readers (e.g. processes) can share the same results folder:
+        results are saved holding the lock of the folder, after loading the
+        results saved meanwhile by the other Readers, and files are replaced at
+        once, so lookups never wait for a Reader saving (see .refresh method).
+
         Keyword Arguments
         ------------------
         file_decrees : str, optional.
@@ -59,7 +233,9 @@ class Reader:
 
         year : str, optional.
             By default "2020".
-            The year of interest.
+            The year of interest, as in the dossier prefix of the person (e.g.
+            "2020" for 2020X 027 dossiers). The persons of all the years are
+            extracted, the year is used to look for a person of a known serie.
 
         Extra arg/kwarg
         ---------------
@@ -71,6 +247,47 @@ class Reader:
             Path to the folder where results will be save. If nothing is passed
             everything will be saved in the place the code is ran /results.
 
+        workers : int
+            Number of processes used to read the JOs pdf files. By default 1
+            (no process pool). See .ingest method.
+
+        storage : Union[str,object]
+            Storage of the results, either "json" (by default, json files
+            written as a whole), "sqlite" (SQLite database where only what each
+            decree adds is written, see .export_json method to get the json
+            files), or a storage object (see JORF_reader.storage module).
+
+        file_db : str
+            File path of the SQLite database if storage is "sqlite". If nothing
+            is passed, the database will be saved in r"results\\naturalized.db".
+
+        compression : str
+            Compression of the decree strings cache of the json storage, "zlib"
+            (by default) or "lzma". The decree strings are kept one compressed
+            file per decree in r"results\\decrees_string" (see
+            JORF_reader.textcache module), and only read when needed.
+
+        report : Union[bool,str]
+            Writes the run report (time of each stage, counters and throughputs,
+            see JORF_reader.metrics module) once the JOs are ingested, to the
+            json file given, or to r"results\\report.json" if True. By default
+            False (see .save_report method).
+
+        profile : str
+            Profiles the reading of each JO pdf file, either "cprofile" (one
+            pstats file per JO) or "tracemalloc" (peak memory of each JO kept in
+            the run report). By default None.
+
+        profile_path : str
+            Path to the folder where the cProfile files are written. If nothing
+            is passed, they will be saved in r"results\\profiles".
+
+        snapshot : str
+            File path of a snapshot of the naturalized persons (see
+            .publish_snapshot method). The persons are then looked for in the
+            snapshot, read in place and shared with the other processes opening
+            it, and no JO is ingested. By default None.
+
 
         Allowed extra Arguments (\*args, or \**kwargs) passed by specifying the keyword from the previous list (see Extra arg/kwarg).
         By default none are passed.
@@ -80,6 +297,9 @@ class Reader:
         >>> example = JORF_Reader()
 
         """
+        # The run report of the Reader starts from here (the registry of the
+        # process is shared with the other Readers, see .save_report method)
+        self._metrics_start = metrics.snapshot()
         # Get initial arguments
         self._save_path = kwargs.get("save_path",os.path.join(os.getcwd(),"results"))
         if not os.path.isdir(self._save_path):
@@ -88,48 +308,54 @@ class Reader:
             file_decrees = os.path.join(self._save_path,"decrees.json")
         else:
             if not os.path.isfile(file_decrees):
-                print("Give valid file path to decrees")
+                logger.warning("Give valid file path to decrees")
                 file_decrees =  os.path.join(self._save_path,"decrees_wrong_path.json")
-        # Look for and load decree json if found
-        if os.path.isfile(file_decrees):
-            with codecs.open(file_decrees, encoding='utf-8') as f:
-                self.decrees = json.load(f)
-        else:
-            self.decrees = {ser:{} for ser in list(range(0,55))+[300,301,302,303,304,305]}
-        # Look for and load decree string json if found
+        # Look for decree string json
         if not file_decrees_string:
             file_decrees_string = os.path.join(self._save_path,"decrees_string.json")
         else:
             if not os.path.isfile(file_decrees_string):
-                print("Give valid file path to decrees string")
+                logger.warning("Give valid file path to decrees string")
                 file_decrees_string = os.path.join(self._save_path,"decrees_string_wrong_path.json")
-        if os.path.isfile(file_decrees_string):
-            with codecs.open(file_decrees_string, encoding='utf-8') as f:
-                self.mega_string = json.load(f)
-        else:
-            self.mega_string = {}
         # Define series of interest
         if (not serie) or (type(serie) != str) or (serie not in [f'{i:03}' for i in range(0,1000)]):
             self.serie = "027"
         else:
             self.serie = serie
-        # Look for and load naturalized dict json if found
+        # Look for naturalized dict json
         if not file_nat:
             file_nat = os.path.join(self._save_path,"naturalized.json")
         else:
             if not os.path.isfile(file_nat):
-                print("Give valid file path to decrees")
+                logger.warning("Give valid file path to naturalized")
                 file_nat = os.path.join(self._save_path,"naturalized_wrong_path.json")
-        if os.path.isfile(file_nat):
-            with codecs.open(file_nat, encoding='utf-8') as f:
-                self.naturalized = json.load(f)
-            self.count = len([nat for nat,value in self.naturalized[self.serie].items() if value])
+        # Define the storage of the decrees, naturalized and decree string
+        storage = kwargs.get("storage","json")
+        json_storage = JSONStorage(file_decrees,file_decrees_string,file_nat,compression=kwargs.get("compression","zlib"))
+        if storage == "json":
+            self._storage = json_storage
+        elif storage == "sqlite":
+            self._storage = SQLiteStorage(kwargs.get("file_db",os.path.join(self._save_path,"naturalized.db")))
         else:
-            self.count = 0
-            self.naturalized = {f'{ser:03}' :{f'{i:03}':{} for i in range(0,1000)} for ser in list(range(0,55))+[300,301,302,303,304,305]}
+            self._storage = storage
+        self._json_storage = json_storage
+        # Decrees, naturalized and decree strings are only loaded when first
+        # needed (see ._load_stores method)
+        self._decrees = None
+        self._naturalized = None
+        self._mega_string = None
+        # Read-only snapshot the persons are looked for in, if given
+        self._snapshot = None
+        if kwargs.get("snapshot"):
+            from .snapshot import NaturalizedSnapshot
+            self._snapshot = NaturalizedSnapshot(kwargs["snapshot"])
+        # Number of times persons were added (caches of lookups are outdated
+        # once it changes, see JORF_reader.server module)
+        self.updates = 0
         self.decree_current_date = ""
-        # Define the pattern to look for the person
-        self.pattern_person = re.compile(r"([A-Z\-\s]*\s\(([a-z-A-Z\s\,\-À-ÿ\’]*){1,9}\)\,)(.*?)(\,\sdpt\s[0-9]{2,3}|\,\sdép\.\s[0-9]{2,3}){1}", re.UNICODE)
+        # Define the patterns to look for the person and its series and dossier
+        self.pattern_person = PATTERN_PERSON
+        self.pattern_dossier = PATTERN_DOSSIER
         # Search for a specific name within the naturalized series
         self.first_name = first_name
         self.last_name = last_name
@@ -138,36 +364,654 @@ class Reader:
         self._file_decrees = file_decrees
         self._file_decrees_string = file_decrees_string
         self._info = os.path.join(self._save_path,"info.json")
-        self._year = year
+        self._file_manifest = os.path.join(self._save_path,"manifest.json")
+        # Lock of the results folder, shared with the other Readers, and
+        # generation of the results loaded (see ._writing method)
+        self._results = ResultsLock(self._save_path)
+        self._generation = self._results.generation()
+        # Held while the stores are merged into or loaded again, so that they
+        # can be refreshed from another thread (see .refresh method)
+        self._stores_lock = threading.RLock()
+        # Decrees merged and not saved yet, while JOs are merged as a batch
+        # (see ._batch method)
+        self._pending = None
+        self._year = str(year)
+        self._count = self._saved_count()
+        # Load the ingestion manifest of the JOs already processed
+        self.manifest = Manifest(self._file_manifest,PARSER_VERSION,PROBE_VERSION)
+        # Profiling of each JO pdf file read
+        self._profile = kwargs.get("profile",None)
+        self._profile_path = kwargs.get("profile_path",os.path.join(self._save_path,"profiles"))
         # For all the files found in JOs folder call read_pdf and get data
-        print(f"Naturalized of serie {self.serie} :",self.count)
+        logger.info("Naturalized of serie %s : %s",self.serie,self.count)
         self._JOs_path = kwargs.get("JOs_path","JOs")
+        if self._snapshot is not None:
+            # Lookups only, the JOs are ingested by the Reader publishing the snapshot
+            return
         if not os.path.isdir(self._JOs_path):
-            print(f"The path {self._JOs_path} is not a valid directory where the JOs are contained.")
+            logger.warning("The path %s is not a valid directory where the JOs are contained.",self._JOs_path)
             return
-        for file in os.listdir(self._JOs_path):
-            # Load pdf file
-            file_path = os.path.join(self._JOs_path,file)
-            if file_path in self.decrees[self.serie].values():
-                continue
-            pdf_date = self.get_date(file_path)
-            if (pdf_date != None) or (pdf_date not in self.mega_string.keys()):
-                # Open the PDF file and parse it to get all information
-                #print(f"Reading {file_path} with date: {pdf_date}")
-                self.read_pdf(pdf_path=file_path)
-                with codecs.open(self._file_decrees_string,"w",encoding="utf-8") as f:
-                    json.dump(self.mega_string, f, ensure_ascii=False)
-                self.search_serie(serie=self.serie,pdf_path=file_path)
-                # Save updated decrees and naturalized json
-                with codecs.open(self._file_decrees,"w", encoding='utf-8') as f:
-                    json.dump(self.decrees, f, ensure_ascii=False)
-                with codecs.open(self._file_nat,"w",encoding="utf-8") as f:
-                    json.dump(self.naturalized, f, ensure_ascii=False)
-                with codecs.open(self._info,"w",encoding="utf-8") as f:
-                    json.dump({"year":self._year,"last_update":datetime.now().strftime("%d/%m/%Y")}, f, ensure_ascii=False)
+        self.ingest(workers=kwargs.get("workers",1))
+        report = kwargs.get("report",False)
+        if report:
+            self.save_report(None if report is True else report)
+
+    def _load_stores(self):
+        """Load the decrees, naturalized and decree strings from the storage."""
+        decrees,naturalized,mega_string = self._storage.load()
+        imported = (decrees is None) and (self._storage is not self._json_storage)
+        if imported:
+            # Import the results found in the json files into the new storage
+            decrees,naturalized,json_strings = self._json_storage.load()
+        self._decrees = {ser:{} for ser in SERIES} if decrees is None else decrees
+        # Decree strings are only read from the storage when asked for
+        self._mega_string = {} if mega_string is None else mega_string
+        # Only the dossiers with persons are kept (legacy json files with all
+        # the dossier slots of all the series are converted)
+        self._naturalized = NaturalizedStore() if naturalized is None else NaturalizedStore.from_json(naturalized)
+        if imported and (decrees is not None):
+            self._storage.import_results(self._decrees,self._naturalized,json_strings)
+
+    @property
+    def decrees(self) -> dict:
+        """Dates and pdf paths of the decrees searched, by series."""
+        if self._decrees is None:
+            self._load_stores()
+        return self._decrees
+
+    @property
+    def naturalized(self) -> NaturalizedStore:
+        """Store of the naturalized persons (or snapshot, if given)."""
+        if self._snapshot is not None:
+            return self._snapshot
+        if self._naturalized is None:
+            self._load_stores()
+        return self._naturalized
+
+    @property
+    def mega_string(self):
+        """Decree strings by date (read from the storage when asked for)."""
+        if self._mega_string is None:
+            self._load_stores()
+        return self._mega_string
+
+    @property
+    def count(self) -> int:
+        """Number of naturalized of the serie of the year (from the info json file until the persons are loaded)."""
+        if (self._snapshot is None) and (self._naturalized is None) and (self._count is not None):
+            return self._count
+        return self.naturalized.count(self.serie,year=self._year)
+
+    def _saved_count(self) -> int:
+        """Number of naturalized of the serie of the year saved in the info json file (None if not saved there)."""
+        if (self._snapshot is None) and os.path.isfile(self._info):
+            with codecs.open(self._info, encoding='utf-8') as f:
+                counts = json.load(f).get("counts",{})
+            return counts.get(f"{self._year}X{self.serie}")
+        return None
+
+    def _save_info(self):
+        """Save the info json file (year, last update and count of each serie of each year, e.g. "2020X027")."""
+        years = dict.fromkeys([self._year]+self.naturalized.years())
+        with atomic_write(self._info) as f:
+            json.dump({"year":self._year,"last_update":datetime.now().strftime("%d/%m/%Y"),
+                       "counts":{f"{yea}X{ser}":self.naturalized.count(ser,year=yea) for yea in years for ser in SERIES}}, f, ensure_ascii=False)
+
+    @contextmanager
+    def _writing(self,save_json:bool=True):
+        """Hold the lock of the results folder while the results are merged and saved.
+
+        The results saved by other Readers since the results of this one were
+        loaded are loaded again first, so that no update of another Reader is
+        lost (nothing is done if save_json is False, or if already writing).
+        """
+        if self._snapshot is not None:
+            raise TypeError("A Reader on a snapshot only looks for persons, see .publish_snapshot method")
+        with self._stores_lock:
+            if (not save_json) or self._results.locked:
+                yield
+                return
+            with self._results.write() as generation:
+                if generation != self._generation:
+                    self._reload(generation)
+                yield
+            self._generation = self._results.generation()
+
+    @contextmanager
+    def _batch(self,save_json:bool=True):
+        """Hold the lock of the results folder while JOs are merged, and save them all at once.
+
+        The decrees merged meanwhile (see ._apply method) are saved at the end,
+        even if the batch is interrupted, with the info json file and the
+        manifest (nothing is saved if save_json is False, a batch within a
+        batch is saved with it).
+        """
+        with self._writing(save_json):
+            if (not save_json) or (self._pending is not None):
+                yield
+                return
+            self._pending = []
+            try:
+                yield
+            finally:
+                decrees,self._pending = self._pending,None
+                with metrics.stage("save"):
+                    if decrees:
+                        self._storage.write_decrees(self,decrees)
+                    self._save_info()
+                    self.manifest.save()
+
+    def _reload(self,generation:int):
+        """Load again the manifest, and the stores if already loaded, saved by other Readers."""
+        self.manifest = Manifest(self._file_manifest,PARSER_VERSION,PROBE_VERSION)
+        if self._decrees is not None:
+            self._load_stores()
+        self._count = self._saved_count()
+        self._generation = generation
+        self.updates += 1
+
+    def refresh(self) -> bool:
+        """Load the results again if other Readers saved new ones since they were loaded.
+
+        Never waits for the Readers writing the results: the results are only
+        loaded once no Reader is writing them, and loaded again if a Reader
+        started writing them meanwhile, so that lookups always see a consistent
+        snapshot of the results (the previous one is kept until then). A
+        Reader on a snapshot opens it again once published again.
+
+        It may be called from another thread than the one merging the JOs
+        (e.g. by the lookup server): nothing is done while the Reader merges
+        or saves results.
+
+        Returns
+        -------
+        bool:
+            True if the results were loaded again.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader(JOs_path="")
+        >>> example.refresh()
+        False
+        """
+        if not self._stores_lock.acquire(blocking=False):
+            # Results being merged or loaded by this Reader
+            return False
+        try:
+            if self._snapshot is not None:
+                if not self._snapshot.changed():
+                    return False
+                self._snapshot = type(self._snapshot)(self._snapshot.file_snapshot)
+                self.updates += 1
+                return True
+            for _ in range(REFRESH_TRIES):
+                generation = self._results.generation()
+                if (generation == self._generation) or (generation % 2):
+                    # Up to date, or results being written
+                    return False
+                self._reload(generation)
+                if self._results.generation() == generation:
+                    return True
+            # Results written again each time, loaded again at the next refresh
+            self._generation = None
+            return True
+        finally:
+            self._stores_lock.release()
+
+    def save_report(self,file_report:str=None) -> dict:
+        """Save the run report of the Reader.
+
+        The run report gives the time spent in each stage (first_page,
+        outline, page_layout, read_jo, parse_persons, save, search_person,
+        ...), the counters (pages, jos, persons, lookups, bytes_written, ...),
+        the throughputs (pages, persons and lookups per second) and the files
+        profiled (see JORF_reader.metrics module), since the Reader was
+        created. Stages and counters of the JOs read in worker processes are
+        included.
+
+        Keyword Arguments
+        ------------------
+        file_report : str, optional.
+            By default None.
+            File path where the report json file will be stored. If None, the
+            file will be saved in r"results\\report.json".
+
+        Returns
+        -------
+        dict:
+            The run report.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader(profile="tracemalloc")
+        >>> example.save_report()["rates"]
+        {'pages_per_second': 41.2, 'persons_per_second': 52310.8}
+        """
+        if file_report is None:
+            file_report = os.path.join(self._save_path,"report.json")
+        metrics.save(file_report,since=self._metrics_start)
+        logger.info("Run report saved to %s",file_report)
+        return metrics.report(since=self._metrics_start)
+
+    def ingest(self,paths:Iterable[str]=None,workers:int=1,save_json:bool=True) -> list:
+        """Read JO pdf files and extract the persons of all the series.
+
+        Loads every new pdf, extracts its decree string and parses its persons,
+        and merges the results into the decree string, decrees and naturalized
+        dictionaries. The JOs are identified by their content in the ingestion
+        manifest, so only new or modified pdf files are read, and only the
+        missing extraction stages are done (e.g. a new parser version only
+        parses the persons again from the decree strings already known).
+
+        The title page of each new pdf is probed first (see .probe method): JOs
+        without naturalization decrees are skipped, and only the pages of the
+        decrees are read from the other ones.
+
+        If more than one worker is given, the pdf files are read in parallel
+        within a process pool (on Windows, the calling script must then be
+        protected by a ``if __name__ == "__main__":`` block). Results are always
+        merged in the order of the sorted pdf paths.
+
+        Keyword Arguments
+        ------------------
+        paths : Iterable[str], optional.
+            By default None.
+            PDF paths of the JOs to read. If None, all the files found in the
+            "JOs" folder are read.
+
+        workers : int, optional.
+            By default 1.
+            Number of processes used to read the pdf files.
+
+        save_json : bool, optional.
+            By default True.
+            Saves the json dictionaries to default saving files once all the
+            pdf files are merged (the lock of the results folder is held
+            meanwhile, see .refresh method).
+
+        Returns
+        -------
+        list:
+            Dates of the decrees merged.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> example.ingest(workers=4)
+        ['23/06/2021', '01/07/2021']
+        """
+        if paths is None:
+            paths = [os.path.join(self._JOs_path,file) for file in os.listdir(self._JOs_path)]
+        to_read,to_parse = self._plan(paths)
+        merged = []
+        if not (to_read or to_parse):
+            return merged
+        # The results are saved once all the JOs are merged
+        with metrics.stage("ingest"), self._batch(save_json):
+            for path,digest in to_parse:
+                date = self.manifest.get(digest)["date"]
+                if self._merge(path,digest,date,self.mega_string[date],self.parse_persons(self.mega_string[date]),save_json):
+                    merged.append(date)
+            read_jo = partial(_read_jo,profile=self._profile,profile_path=self._profile_path)
+            if (workers > 1) and (len(to_read) > 1):
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=min(workers,len(to_read)))
+                results = pool.map(read_jo,to_read)
             else:
+                pool = None
+                results = map(read_jo,to_read)
+            try:
+                for result in results:
+                    pdf_date = self._merge_read(result,save_json,pooled=pool is not None)
+                    if pdf_date is not None:
+                        merged.append(pdf_date)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+        return merged
+
+    def _plan(self,paths:Iterable[str],digests:dict=None) -> tuple:
+        """Split JO pdf files between the ones to be read and the ones whose persons only have to be parsed again (the ones already processed are left out, digests are the content hashes already computed)."""
+        to_read,to_parse = [],[]
+        digests = {} if digests is None else digests
+        for path in sorted(path for path in paths if os.path.isfile(path)):
+            digest = self.manifest.identify(path,digests.get(path))
+            if (digest not in self.manifest) and (path in self.decrees[self.serie].values()):
+                # JO processed before the manifest existed
+                date = [date for date,pdf_path in self.decrees[self.serie].items() if pdf_path == path][0]
+                if date in self.mega_string.keys():
+                    self.manifest.record(digest,path,date,"text")
+                    if all(path in self.decrees[ser].values() for ser in SERIES):
+                        self.manifest.record(digest,path,date,"persons")
+            missing = self.manifest.missing_stages(digest)
+            if not missing:
                 continue
+            entry = self.manifest.get(digest)
+            if ("text" in missing) or (entry.get("decrees") == 0) or (entry["date"] not in self.mega_string.keys()):
+                to_read.append(path)
+            else:
+                to_parse.append((path,digest))
+        return to_read,to_parse
+
+    def _merge_read(self,result:tuple,save_json:bool=True,pooled:bool=False,digest:str=None) -> str:
+        """Merge a JO read by _read_jo and save it (date of the decree merged, None if nothing merged)."""
+        with self._batch(save_json):
+            return self._apply_read(result,pooled,digest)
+
+    def _apply_read(self,result:tuple,pooled:bool=False,digest:str=None) -> str:
+        """Merge a JO read by _read_jo into the stores, without lock nor save (see ._apply method)."""
+        pdf_path,pdf_date,string,persons,stats = result
+        if pooled:
+            # Stages and counters of the worker process
+            metrics.merge(stats)
+        if string is None:
+            # No naturalization decree in the JO (even without date, e.g. a
+            # title page without text), only remembered in the manifest so
+            # that it is not probed again
+            self.manifest.skip(self.manifest.identify(pdf_path,digest),pdf_path,pdf_date)
+            return None
+        if pdf_date is None:
+            logger.warning("No date found on the title page of %s, its decrees are not merged",pdf_path)
+            return None
+        if not self._apply(pdf_path,self.manifest.identify(pdf_path,digest),pdf_date,string,persons):
+            return None
+        return pdf_date
+
+    def _merge(self,pdf_path:str,digest:str,pdf_date:str,string:str,persons:list,save_json:bool=True) -> bool:
+        """Merge the decree string and persons of a JO, record it in the manifest and save it (False if merged meanwhile by another Reader)."""
+        with self._batch(save_json):
+            return self._apply(pdf_path,digest,pdf_date,string,persons)
+
+    def _apply(self,pdf_path:str,digest:str,pdf_date:str,string:str,persons:list) -> bool:
+        """Merge the decree string and persons of a JO into the stores and the manifest, saved at the end of the batch (see ._batch method), and tell whether merged."""
+        if (self._pending is not None) and not self.manifest.missing_stages(digest):
+            # Merged meanwhile by another Reader of the results folder
+            return False
+        self.decree_current_date = pdf_date
+        self.mega_string[pdf_date] = string
+        self.manifest.record(digest,pdf_path,pdf_date,"text")
+        self._add_persons(pdf_date,persons,SERIES)
+        for ser in SERIES:
+            self.decrees.setdefault(ser,{}).update({pdf_date:pdf_path})
+        self.manifest.record(digest,pdf_path,pdf_date,"persons")
+        logger.info("Naturalized of serie %s until Journal of %s: %s",self.serie,pdf_date,self.naturalized.count(self.serie,year=self._year))
+        if self._pending is not None:
+            self._pending.append((pdf_date,pdf_path,SERIES,persons))
+        return True
+
+    def reindex(self,workers:int=1,save_json:bool=True) -> int:
+        """Extract again all the persons from the decree strings already known.
+
+        Parses the persons of all the series of every decree string of the
+        results (no pdf file is read), e.g. after the persons parser changed.
+        The persons are added to a new store, which replaces the naturalized
+        dictionary only once complete (lookups meanwhile see the old one), then
+        the results are written as a whole (see the write_all method of the
+        storages) and the JOs are recorded as parsed with the current parser
+        version in the ingestion manifest.
+
+        Keyword Arguments
+        ------------------
+        workers : int, optional.
+            By default 1.
+            Number of processes parsing the decree strings (on Windows, the
+            calling script must then be protected by a ``if __name__ == "__main__":``
+            block).
+
+        save_json : bool, optional.
+            By default True.
+            Saves the results once reindexed.
 
+        Returns
+        -------
+        int:
+            Number of persons found.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> example.reindex(workers=4)
+        3150
+        """
+        with self._writing(save_json):
+            dates = list(self.mega_string.keys())
+            store = NaturalizedStore()
+            with metrics.stage("reindex"):
+                if (workers > 1) and (len(dates) > 1):
+                    from concurrent.futures import ProcessPoolExecutor
+                    pool = ProcessPoolExecutor(max_workers=min(workers,len(dates)))
+                else:
+                    pool = None
+                try:
+                    # Decree strings are sent to the workers a batch at a time, so
+                    # that they are not all in memory at once
+                    batch = 4*workers if pool is not None else 1
+                    for start in range(0,len(dates),batch):
+                        batch_dates = dates[start:start+batch]
+                        if pool is not None:
+                            results = list(pool.map(Reader.parse_persons,[self.mega_string[date] for date in batch_dates]))
+                            metrics.count("persons",sum(len(persons) for persons in results))
+                        else:
+                            results = [self.parse_persons(self.mega_string[date]) for date in batch_dates]
+                        for date,persons in zip(batch_dates,results):
+                            self._add_persons(date,persons,SERIES,store=store)
+                finally:
+                    if pool is not None:
+                        pool.shutdown()
+                # All the series are now searched in all the decrees
+                for date in dates:
+                    path = next((searched[date] for searched in self.decrees.values() if date in searched),None)
+                    for ser in SERIES:
+                        self.decrees.setdefault(ser,{})[date] = path
+                # The new store replaces the old one at once
+                self._naturalized = store
+                self.updates += 1
+                self.manifest.parsed(dates)
+                if save_json:
+                    with metrics.stage("save"):
+                        self._storage.write_all(self)
+                        self._save_info()
+                        self.manifest.save()
+        logger.info("Reindexed %s decrees, naturalized of serie %s : %s",len(dates),self.serie,self.count)
+        return len(store)
+
+    async def watch(self,interval:float=2.0,workers:int=1,queue_size:int=8,save_json:bool=True,stop:"asyncio.Event"=None,on_merge:Callable=None):
+        """Watch the JOs folder and ingest the new pdf files as they land.
+
+        Coroutine polling the "JOs" folder every interval (no rescan of the
+        files already known, only their size and modification time are
+        checked). A new or modified pdf file is queued once it is complete (same
+        size and modification time at two polls in a row, or not modified for
+        an interval), and read within a pool of workers (see .ingest method).
+        The queue is bounded: when the workers are behind, the folder is not
+        polled until a place is free. The JOs read are saved by a single writer
+        thread, those read meanwhile as a batch (see .ingest method), while the
+        event loop only merges them into the stores (between two lookups, see
+        server.LookupServer), so their persons can be looked for at once.
+
+        Keyword Arguments
+        ------------------
+        interval : float, optional.
+            By default 2.0.
+            Time (s) between two polls of the folder.
+
+        workers : int, optional.
+            By default 1.
+            Number of JOs read at the same time, within a process pool if more
+            than one (within a thread otherwise).
+
+        queue_size : int, optional.
+            By default 8.
+            Maximum number of JOs waiting to be read.
+
+        save_json : bool, optional.
+            By default True.
+            Saves the results to the storage after each batch of JOs merged.
+
+        stop : asyncio.Event, optional.
+            By default None.
+            Event stopping the watch once set (the JOs queued are still merged).
+            If None, the folder is watched until the task is cancelled.
+
+        on_merge : Callable, optional.
+            By default None.
+            Function called with the date and pdf path of each JO merged.
+
+        Returns
+        -------
+        list:
+            Dates of the decrees merged.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> asyncio.run(example.watch(interval=5,workers=2))
+        """
+        import asyncio
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event() if stop is None else stop
+        queue = asyncio.Queue(maxsize=queue_size)
+        # JOs read (or parsed again), waiting to be merged and saved
+        merges = asyncio.Queue()
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else ThreadPoolExecutor(max_workers=1)
+        writer = ThreadPoolExecutor(max_workers=1)
+        read_jo = partial(_read_jo,profile=self._profile,profile_path=self._profile_path)
+        merged = []
+
+        async def poll():
+            # Size and modification time of the files seen at the last poll,
+            # and of the files queued
+            seen,queued = {},{}
+            while not stop.is_set():
+                with os.scandir(self._JOs_path) as entries:
+                    files = [(entry.path,entry.stat()) for entry in entries if entry.is_file() and entry.name.lower().endswith(".pdf")]
+                for path,stat in sorted(files):
+                    key = (stat.st_size,stat.st_mtime_ns)
+                    if queued.get(path) == key:
+                        continue
+                    if (seen.get(path) != key) and (time.time()-stat.st_mtime < interval):
+                        # The file may still be written
+                        seen[path] = key
+                        continue
+                    seen.pop(path,None)
+                    queued[path] = key
+                    # Waits while the queue is full
+                    await queue.put(path)
+                try:
+                    await asyncio.wait_for(stop.wait(),interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        async def ingest():
+            while True:
+                path = await queue.get()
+                try:
+                    # A new pdf file is hashed within a thread, so that the
+                    # event loop is not held meanwhile
+                    digest = self.manifest.known(path)
+                    if digest is None:
+                        digest = await loop.run_in_executor(None,file_digest,path)
+                    to_read,to_parse = self._plan([path],digests={path:digest})
+                    for pdf_path,parsed_digest in to_parse:
+                        date = self.manifest.get(parsed_digest)["date"]
+                        persons = await loop.run_in_executor(pool,Reader.parse_persons,self.mega_string[date])
+                        # Merged as a JO read, its decree string being known
+                        await merges.put((pdf_path,partial(self._apply_read,(pdf_path,date,self.mega_string[date],persons,None),False,parsed_digest)))
+                    for pdf_path in to_read:
+                        result = await loop.run_in_executor(pool,read_jo,pdf_path)
+                        await merges.put((pdf_path,partial(self._apply_read,result,workers > 1,digest)))
+                except Exception:
+                    # The file is tried again only once modified
+                    logger.exception("The JO %s could not be ingested",path)
+                finally:
+                    queue.task_done()
+
+        async def write():
+            while True:
+                batch = [await merges.get()]
+                while not merges.empty():
+                    batch.append(merges.get_nowait())
+                try:
+                    done = await loop.run_in_executor(writer,self._write_batch,loop,batch,save_json)
+                except Exception:
+                    logger.exception("The JOs %s could not be saved",", ".join(pdf_path for pdf_path,_ in batch))
+                    done = []
+                finally:
+                    for _ in batch:
+                        merges.task_done()
+                for date,pdf_path in done:
+                    merged.append(date)
+                    if on_merge is not None:
+                        on_merge(date,pdf_path)
+
+        tasks = [asyncio.create_task(ingest()) for _ in range(workers)]+[asyncio.create_task(write())]
+        logger.info("Watching %s for new JOs",self._JOs_path)
+        try:
+            await poll()
+            await queue.join()
+            await merges.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks,return_exceptions=True)
+            pool.shutdown()
+            # A batch being saved is left to the writer thread
+            writer.shutdown(wait=False)
+        return merged
+
+    def _write_batch(self,loop:"asyncio.AbstractEventLoop",batch:list,save_json:bool=True) -> list:
+        """Merge a batch of JOs on the event loop and save them (run within the writer thread of .watch method).
+
+        The lock of the results folder is held and the batch saved within this
+        thread, while each merge is run on the event loop, so that the stores
+        are never changed during a lookup.
+
+        Arguments
+        ----------
+        loop : asyncio.AbstractEventLoop, required.
+            Event loop of the watch.
+
+        batch : list, required.
+            Tuples (pdf path, merge function) of the JOs to merge, the merge
+            functions return the date of the decree merged (None if nothing
+            merged, see ._apply_read method).
+
+        Keyword Arguments
+        ------------------
+        save_json : bool, optional.
+            By default True.
+            Saves the results to the storage once the batch is merged.
+
+        Returns
+        -------
+        list:
+            Dates and pdf paths of the decrees merged.
+        """
+        import asyncio
+
+        async def apply(merge):
+            return merge()
+
+        done = []
+        with self._batch(save_json):
+            for pdf_path,merge in batch:
+                try:
+                    date = asyncio.run_coroutine_threadsafe(apply(merge),loop).result()
+                except Exception:
+                    # The file is tried again only once modified
+                    logger.exception("The JO %s could not be merged",pdf_path)
+                    continue
+                if date is not None:
+                    done.append((date,pdf_path))
+        return done
+
+    @timed("read_pdf")
     def read_pdf(self,pdf_path:str,save_json:bool=True,**kwargs):
         """Read the naturalization decrees pdf to extract useful information.
 
@@ -199,53 +1043,20 @@ class Reader:
         >>> example.read_pdf(pdf_path,)
         """
         if not os.path.isfile(pdf_path): return
-        # Load pdf file
-        reader = loaders.load_file(pdf_path)
-        # Get date of decree
-        self.decree_current_date = self.get_date(pdf=reader)
-        # Get the number of decrees in the pdf file
-        decrees_number = self.get_decrees_count(pdf=reader)
-        page_last = reader.page_numbers[-1]
-        # Define the pattern to look for the first decree after the first page
-        # Optimize search since we will skip all text before this pattern
-        pattern_first = re.compile(r"(Décret\sdu)(.*?)(\sNOR){1}", re.UNICODE)
-        # Get all text in first page
-        first_page=" ".join([re.sub(r"\s+|\t+|\n"," ",ele.text()).strip() for ele in reader.get_page(1).elements]).split("JOURNAL  OFFICIEL  DE  LA  RÉPUBLIQUE  FRANÇAISE ")[-1]
-        # Depending on the first page, define the pattern to be used as the last
-        # block to optimize search for persons and neglect all text after pattern.
-        if "Décret modificatif du" in first_page:
-            if re.search(r"Décret modificatif du",first_page).start() > re.search(r"portant naturalisation",first_page).start():
-                pattern_last = r"Décret modificatif du"
-            else:
-                if "Annonces" in first_page:
-                    pattern_last = r"Les annonces sont reçues à la direction de l’information légale et administrative"
-                else:
-                    pattern_last = r"ISSN\s[0-9]*\-{0,1}[0-9]*"
-        elif "rapportant un décret de naturalisation" in first_page:
-            pattern_last = r"rapportant un décret de naturalisation"
-        elif "Annonces" in first_page:
-            pattern_last = r"Les annonces sont reçues à la direction de l’information légale et administrative"
-        else:
-            pattern_last = r"ISSN\s[0-9]*\-{0,1}[0-9]*"
-        del first_page
-        mega_string = ""
-        # Get all text for all pages after the first one into a long string
-        for i in range(2,page_last+1):
-            mega_string = mega_string+" "+" ".join([re.sub(r"\s+|\t+|\n"," ",ele.text()).strip() for ele in reader.get_page(i).elements]).split("JOURNAL  OFFICIEL  DE  LA  RÉPUBLIQUE  FRANÇAISE ")[-1]
-        del reader
-        # Get initial position within long string where search will be made
-        i = re.search(pattern_first, mega_string).start()
-        # Get final position within long string where search will be made
-        final_pos = re.search(pattern_last, mega_string).start()
-        # Reduce long string to a horter string to optimize search
-        mega_string = mega_string[i:final_pos]
-        del final_pos,i,pattern_first,pattern_last
-        self.mega_string[self.decree_current_date] = mega_string
-        if save_json:
-            file_decrees_string = kwargs.get("file_decrees_string",self._file_decrees_string)
-            with codecs.open(file_decrees_string,"w",encoding="utf-8") as f:
-                json.dump(self.mega_string, f, ensure_ascii=False)
-
+        # Probe the title page of the pdf file (date, decrees and end marker)
+        info = self.probe(pdf_path)
+        self.decree_current_date = info["date"]
+        # Get the decree string from the pages of the decrees, read one page at
+        # a time and only until the end of the decrees (no page is read if the
+        # JO has no naturalization decree)
+        decree_string = _probed_decree_string(pdf_path,info)
+        with self._writing(save_json):
+            self.mega_string[self.decree_current_date] = decree_string
+            if save_json:
+                with metrics.stage("save"):
+                    self._storage.write_decree_string(self,self.decree_current_date,**kwargs)
+
+    @timed("search_serie")
     def search_serie(self,serie:str="",pdf_path:str="",save_json:bool=True,search_person: bool = False, all_series : bool =False,**kwargs):
         """Search for all persons of a serie in a decree.
 
@@ -274,7 +1085,8 @@ class Reader:
 
         all_series : bool, optional.
             By default False.
-            Calls .search_person for all series [0-54 + special] if True.
+            Extracts all series [0-54 + special] in a single pass over the decree
+            string if True.
 
         Extra arg/kwarg
         ---------------
@@ -297,9 +1109,6 @@ class Reader:
         # If serie not passed, self.serie will be used
         if (not serie) or (type(serie) != str) or (serie not in [f'{i:03}' for i in range(0,1000)]):
             serie = self.serie
-        if all_series:
-            for ser in list(range(0,55))+[300,301,302,303,304,305]:
-                self.search_serie(serie=f'{ser:03}')
         self.serie = serie
         # If specific pdf path not given, the search will be done for all PDFs
         # found in the "JOs" folder.
@@ -307,59 +1116,195 @@ class Reader:
             # For all files, open the PDF file and parse it to get all information
             for file in os.listdir(self._JOs_path):
                 pdf_path = os.path.join(self._JOs_path,file)
-                if pdf_path in self.decrees[self.serie].values():
-                    print(f"Skipping {pdf_path} for {self.serie}")
-                    return None
-                date = self.get_date(pdf_path)
-                if date is None :
+                if self.get_date(pdf_path) is None:
                     continue
-                if date not in self.mega_string.keys():
-                    print(f"calling read_pdf for {self.serie}")
-                    self.read_pdf(pdf_path=pdf_path)
-                self.search_serie(serie=self.serie,pdf_path=pdf_path)
+                self.search_serie(serie=serie,pdf_path=pdf_path,save_json=save_json,all_series=all_series,**kwargs)
+            if search_person:
+                logger.info("%s",self.search_person(first_name = self.first_name, last_name = self.last_name,know_series = True))
+            return None
         if not os.path.isfile(pdf_path):
-            print("pdf_path is not found, or not the correct path to the pdf file")
+            logger.warning("pdf_path is not found, or not the correct path to the pdf file")
+            return None
         current_date = self.get_date(pdf_path)
         self.decree_current_date = current_date
-        if self.decree_current_date in self.decrees[self.serie].keys():
-            return None
-        if current_date not in self.mega_string.keys() :
-            self.read_pdf(pdf_path=pdf_path)
-        # Get all the persons found within the optimized string
-        final = []
-        final = ["".join(ele) for ele in self.pattern_person.findall(self.mega_string[current_date])]
-        # For all persons found, look if they match series of interest and extract
-        # information (name, department, country of birth, date of decree).
-        for person in final:
-            if f"), NAT, 2020X {self.serie}" in person:
-                series = person.split(f"), NAT, 2020X {self.serie}")[-1].split(",")[0].strip()
-                name = person.split(f", né")[0].strip()
-                dpt = person.split(f", dép.")[-1].strip()
-                temp = re.split(r"né[e]{0,1} le [0-9]{2}\/[0-9]{2}/[0-9]{4} à",person)[-1].strip()
-                born_in,country = temp.split(")")[0].split("(")
-                born_in = born_in.strip()
-                country = country.strip()
-                if country.isdigit():
-                    # If born_in strign is a number it means the person was born
-                    # in a department of France.
-                    country = "France"
-                self.naturalized[self.serie][series].update({name:{"date":current_date},"dep":dpt,"country":country})
-        print(f"Naturalized of serie {self.serie} until Journal of {self.decree_current_date}:",len([ex for ex,val in self.naturalized[self.serie].items() if val]))
-        self.decrees[self.serie].update({current_date:pdf_path})
-        # Calls search_person to print the name (if found) of person of interest
-        if search_person:
-            print(self.search_person(first_name = self.first_name, last_name = self.last_name,known_serie = True))
-        # Save modified json dictionaries to defined paths
-        if save_json:
-            # Get file paths from kwargs, or default and save decrees and naturalized json
-            file_decrees = kwargs.get("file_decrees",self._file_decrees)
-            file_nat = kwargs.get("file_nat",self._file_nat)
-            with codecs.open(file_decrees,"w", encoding='utf-8') as f:
-                json.dump(self.decrees, f, ensure_ascii=False)
-            with codecs.open(file_nat,"w",encoding="utf-8") as f:
-                json.dump(self.naturalized, f, ensure_ascii=False)
-
-    def search_person(self,first_name:str="",last_name:str="",know_series:bool=True) -> Union[dict,str]:
+        with self._writing(save_json):
+            # Only the series for which the decree has not been searched yet are kept
+            series = [ser for ser in (SERIES if all_series else [self.serie]) if current_date not in self.decrees.setdefault(ser,{})]
+            if not series:
+                return None
+            if current_date not in self.mega_string.keys() :
+                self.read_pdf(pdf_path=pdf_path)
+            persons = self.parse_persons(self.mega_string[current_date])
+            self._add_persons(current_date,persons,series)
+            for ser in series:
+                self.decrees[ser].update({current_date:pdf_path})
+            logger.info("Naturalized of serie %s until Journal of %s: %s",self.serie,self.decree_current_date,self.naturalized.count(self.serie,year=self._year))
+            # Calls search_person to log the name (if found) of person of interest
+            if search_person:
+                logger.info("%s",self.search_person(first_name = self.first_name, last_name = self.last_name,know_series = True))
+            # Save modified json dictionaries to defined paths
+            if save_json:
+                # Save decrees and naturalized (file paths from kwargs for json storage)
+                with metrics.stage("save"):
+                    self._storage.write_decree(self,current_date,pdf_path,series,persons,**kwargs)
+                    self._save_info()
+
+    def export_json(self,**kwargs):
+        """Export the results to the decrees, decrees string and naturalized json files.
+
+        Extra arg/kwarg
+        ---------------
+        file_decrees : str
+            Save file path for decrees json.
+
+        file_decrees_string : str
+            Save file path for decrees string json.
+
+        file_nat : str
+            Save file path for naturalization json.
+
+
+        Allowed extra Arguments (\*args, or \**kwargs) passed by specifying the keyword from the previous list (see Extra arg/kwarg).
+        By default the files given upon class object's instantiation are written.
+
+        Example
+        -------
+        >>> example = JORF_Reader(storage="sqlite")
+        >>> example.export_json()
+        """
+        with self._writing():
+            JSONStorage(self._file_decrees,self._file_decrees_string,self._file_nat).export(self,**kwargs)
+
+    def export_table(self,file_table:str="") -> "RecordTable":
+        """Export the naturalized persons to a columnar table for analytics.
+
+        The year, serie, decree date, department and country of the persons
+        are encoded as categories (see JORF_reader.analytics module), so that
+        the persons can be counted by any of them without going through the
+        naturalized dictionary again.
+
+        Keyword Arguments
+        ------------------
+        file_table : str, optional.
+            By default "".
+            File path where the table is saved. If default is left, the table
+            is only returned (see RecordTable.save and RecordTable.to_csv methods).
+
+        Returns
+        -------
+        RecordTable:
+            Table of all the naturalized persons.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> table = example.export_table(r"results\\naturalized.table")
+        >>> table.group_count("country",year="2020",serie="027")
+        {('Mexique',): 154, ('Maroc',): 97}
+        """
+        from .analytics import RecordTable
+        table = RecordTable.from_records(self.naturalized)
+        if file_table:
+            table.save(file_table)
+            written(file_table)
+        return table
+
+    @timed("snapshot")
+    def publish_snapshot(self,file_snapshot:str="") -> str:
+        """Publish a read-only snapshot of the naturalized persons and of their name index.
+
+        The snapshot is a binary file of sorted string tables and arrays (see
+        JORF_reader.snapshot module) read in place from a memory map: Readers
+        opening it (see the snapshot extra kwarg) start without loading the
+        results, and all the lookup processes share one copy of the persons.
+        The results saved by other Readers are loaded first (see .refresh
+        method), and the snapshot is replaced at once.
+
+        Keyword Arguments
+        ------------------
+        file_snapshot : str, optional.
+            By default "".
+            File path of the snapshot. If default is left, the snapshot will be
+            saved in r"results\\naturalized.snapshot".
+
+        Returns
+        -------
+        str:
+            File path of the snapshot.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> file_snapshot = example.publish_snapshot()
+        >>> lookups = JORF_Reader(snapshot=file_snapshot)
+        >>> lookups.search_person(first_name="Alejandro",last_name="Villarreal",know_series=False)
+        {'VILLARREAL LARRAURI (Alejandro)': {'date': '23/06/2021'}, 'dep': '013', 'country': 'Mexique'}
+        """
+        from .snapshot import NaturalizedSnapshot
+        if not file_snapshot:
+            file_snapshot = os.path.join(self._save_path,"naturalized.snapshot")
+        self.refresh()
+        count = NaturalizedSnapshot.publish(self.naturalized,file_snapshot)
+        logger.info("Published the snapshot of %s naturalized to %s",count,file_snapshot)
+        return file_snapshot
+
+    def extract_persons(self,decree_date:str,series:Iterable[str]=None) -> dict:
+        """Extract the persons of all the series of a decree in a single pass.
+
+        Walks the decree string once and sends every person found to its series
+        and dossier slot within the naturalized dictionary, instead of scanning
+        the whole decree string once per series.
+
+        Arguments
+        ----------
+        decree_date : str, required.
+            Date of the decree (key of the decree string dictionary).
+
+        Keyword Arguments
+        ------------------
+        series : Iterable[str], optional.
+            By default None.
+            Series to be filled. If None, all the series [0-54 + special] are filled.
+
+        Returns
+        -------
+        dict:
+            Number of persons found in the decree for each of the filled series.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> example.read_pdf(pdf_path)
+        >>> example.extract_persons("23/06/2021",series=["027"])
+        {'027': 154}
+        """
+        series = SERIES if series is None else series
+        return self._add_persons(decree_date,self.parse_persons(self.mega_string[decree_date]),series)
+
+    def _add_persons(self,decree_date:str,persons:list,series:Iterable[str],store:NaturalizedStore=None) -> dict:
+        """Add the persons parsed from a decree to the naturalized dictionary (or to another store).
+
+        The persons of the decree already in the naturalized dictionary for
+        these series are replaced (e.g. decree parsed again by a new parser).
+        """
+        series = set(series)
+        found = {ser:0 for ser in series}
+        if store is None:
+            store = self.naturalized
+            store.remove_decree(decree_date,series)
+            self.updates += 1
+        for year,serie,number,name,dpt,country in persons:
+            if serie not in series:
+                continue
+            store.add(PersonRecord(serie,number,name,decree_date,dpt,country,year=year))
+            found[serie] += 1
+        return found
+
+    @timed("search_person")
+    def search_person(self,first_name:str="",last_name:str="",know_series:bool=True,mode:str="substring",fuzzy:bool=False,max_distance:int=2,year:str=None) -> Union[dict,list,str]:
         """Looks for a person within the naturalized database
 
         Looks for a person to see if he/she is within the series and prints out
@@ -378,13 +1323,34 @@ class Reader:
         know_serie : bool, optional.
             By default True.
             True or False if the persons series is known and currently set in
-            self.serie value.
+            self.serie value (the dossier being of the year of interest).
+
+        mode : str, optional.
+            By default "substring".
+            How the names are matched, regardless of accents and case: "exact",
+            "prefix" or "substring".
+
+        fuzzy : bool, optional.
+            By default False.
+            Looks for the persons with names close to the ones given (regardless
+            of accents, case and spaces) instead of using mode.
+
+        max_distance : int, optional.
+            By default 2.
+            Maximum number of characters edited for each name if fuzzy is True.
+
+        year : str, optional.
+            By default None.
+            Year of the dossier of the person. If None, the year of interest
+            if the series is known, otherwise all the years.
 
         Returns
         -------
-        Union[dict,str]:
-            Either the dictionary of the information of the person if found, or a
-            message warning the person was not found or string was misspelled.
+        Union[dict,list,str]:
+            Either the dictionary of the information of the person if found (or
+            if fuzzy is True, the list of dictionaries of the persons found,
+            from the closest one and with their "distance"), or a message
+            warning the person was not found or string was misspelled.
 
 
         Example
@@ -396,56 +1362,275 @@ class Reader:
         """
         if not first_name: first_name = self.first_name
         if not last_name: last_name = self.last_name
-        location = None
-        if know_series:
-            # If the series is known, only gets results from the naturalized dictionary
-            # only from the serie of interest.
-            persons = [list(val.keys())[0] if val else "" for val in self.naturalized[self.serie].values()]
-            for i,person in enumerate(persons):
-                if not person:continue
-                last = person.split("(")[0].strip().strip(",")
-                first = person.split("(")[-1].strip(")").strip(",").strip()
-                if (first_name.lower() in first.lower()) and (last_name.lower() in last.lower()):
-                    location = i
-                    break
-            persona = self.naturalized[self.serie][list(self.naturalized[self.serie].keys())[location]]
-        else:
-            # If the series is NOT known, gets results from the naturalized dictionary
-            # from all the series, and returns the persons information and date of
-            # publication if found.
-            persons = []
-            for serie in self.naturalized.keys():
-                persons += [(serie,list(val.keys())[0]) if val else "" for val in self.naturalized[serie].values()]
-                for i,person in enumerate(persons):
-                    if not person:continue
-                    last = person[0].split("(")[0].strip().strip(",")
-                    first = person[0].split("(")[-1].strip(")").strip(",").strip()
-                    if (first_name.lower() in first.lower()) and (last_name.lower() in last.lower()):
-                        location = i
-                        found_in = serie
-                        break
-                if location:
-                    persona = self.naturalized[found_in][list(self.naturalized[found_in].keys())[location]]
-                    break
-        if location == None:
+        metrics.count("lookups")
+        # If the series is known, only gets results from the naturalized persons
+        # of the serie (and year) of interest, otherwise from all the series.
+        serie = self.serie if know_series else None
+        if year is None:
+            year = self._year if know_series else None
+        if fuzzy:
+            found = self.naturalized.fuzzy_search(last_name=last_name,first_name=first_name,max_distance=max_distance,serie=serie,year=year)
+            if found:
+                return [dict(record.to_dict(),distance=distance) for record,distance in found]
+            return "The fuzzy search has not resulted in any result. The person has not yet been naturalized, or the names are too different."
+        found = self.naturalized.search(last_name=last_name,first_name=first_name,mode=mode,serie=serie,year=year)
+        if not found:
             return "The simple search has not resulted in any result. Make sure name is spelled right. If name is spelled right, then the person has not yet been naturalized."
-        return persona
+        return found[0].to_dict()
+
+    @timed("search_person")
+    def search_dossier(self,dossier:str,name:str="") -> list:
+        """Looks for the persons of a dossier within the naturalized database
+
+        The persons are found directly by their dossier number (year, serie
+        and number of the dossier), without any name search.
+
+        Arguments
+        ----------
+        dossier : str, required.
+            Dossier number as given to the person, e.g. "2020X 027123" (the
+            space is optional, the year is the year of interest if not given,
+            e.g. "027123").
+
+        Keyword Arguments
+        ------------------
+        name : str, optional.
+            By default "".
+            Name of the person as written in the decree (e.g.
+            "VILLARREAL LARRAURI (Alejandro)"), all the persons of the
+            dossier are given if empty.
+
+        Returns
+        -------
+        list:
+            Records (PersonRecord) of the persons of the dossier.
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> print(example.search_dossier("2020X 027123"))
+        [PersonRecord('027', '123', 'VILLARREAL LARRAURI (Alejandro)', '23/06/2021', '013', 'Mexique')]
+        """
+        metrics.count("lookups")
+        found = PATTERN_DOSSIER_NUMBER.fullmatch(dossier.strip())
+        if found is None:
+            raise ValueError(f"Invalid dossier number {dossier}, e.g. 2020X 027123")
+        year,serie,number = found.group(1) or self._year,found.group(2),found.group(3)
+        if name:
+            record = self.naturalized.get(year,serie,number,name)
+            return [] if record is None else [record]
+        return self.naturalized.dossier(serie,number,year=year)
+
+    @timed("search_person")
+    def search_people(self,people:Iterable[tuple],know_series:bool=False,mode:str="substring",fuzzy:bool=False,max_distance:int=2,year:str=None) -> list:
+        """Looks for many persons at once within the naturalized database
+
+        Arguments
+        ----------
+        people : Iterable[tuple], required.
+            Tuples (first_name, last_name) of the persons of interest.
+
+        Keyword Arguments
+        ------------------
+        know_series : bool, optional.
+            By default False.
+            True if all the persons are of the serie currently set in self.serie
+            value (the dossiers being of the year of interest).
+
+        mode : str, optional.
+            By default "substring".
+            How the names are matched, regardless of accents and case: "exact",
+            "prefix" or "substring".
+
+        fuzzy : bool, optional.
+            By default False.
+            Looks for the persons with names close to the ones given (regardless
+            of accents, case and spaces) instead of using mode.
+
+        max_distance : int, optional.
+            By default 2.
+            Maximum number of characters edited for each name if fuzzy is True.
+
+        year : str, optional.
+            By default None.
+            Year of the dossiers of the persons. If None, the year of interest
+            if the series is known, otherwise all the years.
+
+        Returns
+        -------
+        list:
+            For each person of interest, the list of records (PersonRecord) found
+            (from the closest one if fuzzy is True).
+
+
+        Example
+        -------
+        >>> example = JORF_Reader()
+        >>> found = example.search_people([("Alejandro","Villarreal"),("Awa","Diallo")])
+        >>> print(found[0])
+        [PersonRecord('027', '123', 'VILLARREAL LARRAURI (Alejandro)', '23/06/2021', '013', 'Mexique')]
+        """
+        people = list(people)
+        metrics.count("lookups",len(people))
+        serie = self.serie if know_series else None
+        if year is None:
+            year = self._year if know_series else None
+        if fuzzy:
+            return [[record for record,_ in self.naturalized.fuzzy_search(last_name=last_name,first_name=first_name,max_distance=max_distance,serie=serie,year=year)] for first_name,last_name in people]
+        return [self.naturalized.search(last_name=last_name,first_name=first_name,mode=mode,serie=serie,year=year) for first_name,last_name in people]
+
     @staticmethod
-    def get_date(pdf:Union[PDFDocument,str]) ->str:
+    def parse_persons(decree_string:str) -> list:
+        """Static method to get all the persons of a decree string.
+
+        Walks the decree string once and extracts for each person found the
+        year and series of its dossier prefix, its dossier number, name,
+        department and country of birth.
+
+        Arguments
+        ----------
+        decree_string : str, required.
+            Text of the naturalization decrees (see .get_decree_string method).
+
+        Returns
+        -------
+        list:
+            Tuples (year, serie, dossier, name, department, country) of all the persons.
+
+
+        Example
+        -------
+        >>> print(JORF_Reader.parse_persons(decree_string,)[0])
+        ('2020', '027', '123', 'VILLARREAL LARRAURI (Alejandro)', '013', 'Mexique')
+        """
+        with metrics.stage("parse_persons"):
+            persons = list(Reader.iter_persons([decree_string]))
+        metrics.count("persons",len(persons))
+        return persons
+
+    @staticmethod
+    def iter_persons(decree_strings:Iterable[str]) -> Iterator[tuple]:
+        """Static method to get the persons of a decree string given piece by piece.
+
+        The persons are yielded as soon as they are complete, so the decree
+        string does not need to be joined (see .iter_decree_string method).
+        Only the text after the last person found is kept between pieces.
+
+        Arguments
+        ----------
+        decree_strings : Iterable[str], required.
+            Consecutive pieces of the text of the naturalization decrees.
+
+        Yields
+        ------
+        tuple:
+            (year, serie, dossier, name, department, country) of each person.
+
+
+        Example
+        -------
+        >>> persons = JORF_Reader.iter_persons(JORF_Reader.iter_decree_string(iter_page_texts(pdf_path),pattern_last))
+        """
+        buffer = ""
+        for decree_string in decree_strings:
+            buffer += decree_string
+            last = 0
+            for match in PATTERN_RECORD.finditer(buffer):
+                # A person at the very end may go on in the next piece
+                if match.end() >= len(buffer):
+                    break
+                record = _person_record(match)
+                if record is not None:
+                    yield record.year,record.serie,record.dossier,record.name,record.dep,record.country
+                last = match.end()
+            buffer = buffer[last:]
+        for record in parse_person_records(buffer):
+            yield record.year,record.serie,record.dossier,record.name,record.dep,record.country
+
+    @staticmethod
+    def _parse_person(person:str) -> tuple:
+        """Get year, serie, dossier, name, department and country of a person not written as usual (None if no dossier)."""
+        # Get the series of the person and extract information (name,
+        # department, country of birth).
+        dossier = PATTERN_DOSSIER.search(person)
+        if dossier is None:
+            return None
+        name = person.split(f", né")[0].strip()
+        dpt = person.split(f", dép.")[-1].strip()
+        temp = re.split(r"né[e]{0,1} le [0-9]{2}\/[0-9]{2}/[0-9]{4} à",person)[-1].strip()
+        born_in,_,country = temp.split(")")[0].partition("(")
+        born_in = born_in.strip()
+        country = country.strip()
+        if country.isdigit():
+            # If born_in strign is a number it means the person was born
+            # in a department of France.
+            country = "France"
+        return dossier.group(1),dossier.group(2),dossier.group(3).strip(),name,dpt,country
+
+    @staticmethod
+    def probe(pdf_path:str) -> dict:
+        """Static method to classify a JO from its title page only.
+
+        Loads only the title page of the pdf (and its outline, if any) to get
+        the date, the number of naturalization decrees, the kind of end marker
+        of the decrees and the range of pages where the decrees are. The
+        outline gives the range of pages when it lists the decrees, otherwise
+        the decrees are looked for from the second page to the end marker.
+
+        Arguments
+        ----------
+        pdf_path : str, required.
+            Path to the pdf file.
+
+        Returns
+        -------
+        dict:
+            "date" (None if not found), "decrees" (number of naturalization
+            decrees, 0 if none), "end" (kind of end marker, see END_MARKERS),
+            "first_page" and "last_page" (None if up to the end marker) of the JO.
+
+
+        Example
+        -------
+        >>> print(JORF_Reader.probe(pdf_path,))
+        {'date': '23/06/2021', 'decrees': 2, 'end': 'annonces', 'first_page': 2, 'last_page': None}
+        """
+        pdf = load_first_page(pdf_path)
+        first_page = FirstPageInfo.from_pdf(pdf) if 1 in pdf.page_numbers else None
+        info = {"date":Reader.get_date(pdf=pdf),"decrees":first_page.decrees if first_page else 0,
+                "end":first_page.end if first_page else "issn","first_page":2,"last_page":None}
+        with metrics.stage("probe"):
+            entries = outline(pdf_path)
+            decrees = [i for i,(_,title,_) in enumerate(entries) if "portant naturalisation" in title]
+        if decrees:
+            # The decrees end on the page of the next entry of the outline
+            first = entries[decrees[0]][2]
+            following = [page for _,_,page in entries[decrees[-1]+1:] if page >= entries[decrees[-1]][2]]
+            info.update({"decrees":max(info["decrees"],len(decrees)),"first_page":max(first,2),
+                         "last_page":following[0] if following else None})
+        return info
+
+    @staticmethod
+    def get_date(pdf:Union["PDFDocument",str]) ->str:
         """Static method to get the date of the decree.
 
         Extract the date of the decree by reading specific argument of the PDF
-        title page.
+        title page. If a path is given, only the title page is loaded, and the
+        date is remembered for this version of the file. The French date of
+        the header is parsed directly (see dates.parse_jo_date), dateparser
+        is only used if it is not understood.
 
         Arguments
         ----------
-        pdf : PDFDocument, required.
-            Loaded PDF object from py_pdf_parser library.
+        pdf : Union[PDFDocument,str], required.
+            Loaded PDF object from py_pdf_parser library, or path to the pdf file.
 
         Returns
         -------
         str:
-            Date of the decree.
+            Date of the decree (None if not found, e.g. title page without
+            text).
 
 
         Example
@@ -453,18 +1638,158 @@ class Reader:
         >>> print(JORF_Reader.get_date(pdf,))
         15/08/2021
         """
-        if type(pdf) != PDFDocument:
-            if (type(pdf) != str) or (not os.path.isfile(pdf)):
+        if type(pdf) == str:
+            if not os.path.isfile(pdf):
                 return None
-            pdf = loaders.load_file(pdf)
-        return dateparser.parse(pdf.get_page(1).elements[0].text().split("/")[0]).date().strftime("%d/%m/%Y")
+            key = file_key(pdf)
+            if key not in _dates:
+                _dates[key] = Reader.get_date(load_first_page(pdf))
+            return _dates[key]
+        from py_pdf_parser.components import PDFDocument
+        if (type(pdf) != PDFDocument) or (1 not in pdf.page_numbers) or (not pdf.get_page(1).elements):
+            return None
+        header = pdf.get_page(1).elements[0].text()
+        pdf_date = parse_jo_date(header)
+        if pdf_date is None:
+            import dateparser
+            found = dateparser.parse(header.split("/")[0])
+            pdf_date = None if found is None else found.date().strftime("%d/%m/%Y")
+        return pdf_date
 
     @staticmethod
-    def get_decrees_count(pdf:PDFDocument) -> int:
+    def get_decree_string(pdf:"PDFDocument") -> str:
+        """Static method to get the text of the naturalization decrees.
+
+        Join the text of all the pages after the title page, and keep only the
+        part between the first naturalization decree and the end of the decrees
+        (as defined by the title page).
+
+        Arguments
+        ----------
+        pdf : PDFDocument, required.
+            Loaded PDF object from py_pdf_parser library.
+
+        Returns
+        -------
+        str:
+            Text of the naturalization decrees.
+
+
+        Example
+        -------
+        >>> print(JORF_Reader.get_decree_string(pdf,)[:40])
+        Décret du 21 juin 2021 portant naturalis
+        """
+        # Get all text for all pages after the first one
+        page_texts = (page_text(pdf.get_page(i).elements) for i in pdf.page_numbers if i > 1)
+        return "".join(Reader.iter_decree_string(page_texts,Reader.get_end_pattern(pdf=pdf)))
+
+    @staticmethod
+    def get_end_pattern(pdf:"PDFDocument") -> str:
+        """Static method to get the pattern marking the end of the naturalization decrees.
+
+        Depending on the title page, the naturalization decrees are followed by
+        a modifying decree, a decree revoking a naturalization, the announcements,
+        or the end of the JO (see .get_end_marker method).
+
+        Arguments
+        ----------
+        pdf : PDFDocument, required.
+            Loaded PDF object from py_pdf_parser library (at least the title page).
+
+        Returns
+        -------
+        str:
+            Pattern of the text following the last naturalization decree.
+
+
+        Example
+        -------
+        >>> print(JORF_Reader.get_end_pattern(pdf,))
+        ISSN\s[0-9]*\-{0,1}[0-9]*
+        """
+        return END_MARKERS[Reader.get_end_marker(pdf=pdf)]
+
+    @staticmethod
+    def get_end_marker(pdf:"PDFDocument") -> str:
+        """Static method to get the kind of text following the naturalization decrees.
+
+        Arguments
+        ----------
+        pdf : PDFDocument, required.
+            Loaded PDF object from py_pdf_parser library (at least the title page).
+
+        Returns
+        -------
+        str:
+            Kind of end marker (key of END_MARKERS): "modificatif" for a
+            modifying decree, "rapportant" for a decree revoking a naturalization,
+            "annonces" for the announcements, or "issn" for the end of the JO.
+
+
+        Example
+        -------
+        >>> print(JORF_Reader.get_end_marker(pdf,))
+        annonces
+        """
+        return FirstPageInfo.from_pdf(pdf).end
+
+    @staticmethod
+    def iter_decree_string(page_texts:Iterable[str],pattern_last:str) -> Iterator[str]:
+        """Static method to get the text of the naturalization decrees page by page.
+
+        Skips all the text before the first decree, and stops reading pages as
+        soon as the end of the decrees is found. The text is yielded piece by
+        piece, so only about one page is kept in memory.
+
+        Arguments
+        ----------
+        page_texts : Iterable[str], required.
+            Text of the pages after the title page (see documents.iter_page_texts).
+
+        pattern_last : str, required.
+            Pattern of the text following the last decree (see .get_end_pattern method).
+
+        Yields
+        ------
+        str:
+            Consecutive pieces of the text of the naturalization decrees.
+
+
+        Example
+        -------
+        >>> decree_string = "".join(JORF_Reader.iter_decree_string(iter_page_texts(pdf_path),pattern_last))
+        """
+        pattern_last = re.compile(pattern_last,re.UNICODE)
+        buffer = ""
+        started = False
+        for text in page_texts:
+            buffer += " "+text
+            if not started:
+                # Skip all text before the first decree
+                first = PATTERN_FIRST.search(buffer)
+                if first is None:
+                    continue
+                buffer = buffer[first.start():]
+                started = True
+            last = pattern_last.search(buffer)
+            if last is not None:
+                yield buffer[:last.start()]
+                return
+            # Keep the end of the page in case the end of the decrees is split
+            # between two pages
+            cut = max(len(buffer)-TAIL,0)
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+        if started:
+            yield buffer
+
+    @staticmethod
+    def get_decrees_count(pdf:"PDFDocument") -> int:
         """Count the degrees contained in the pdf.
 
         Read a part of the title page and count only the amount of naturalization
-        decrees contianed in the pdf.
+        decrees contianed in the pdf (0 if the title page has no naturalization).
 
         Arguments
         ----------
@@ -482,17 +1807,86 @@ class Reader:
         >>> print(JORF_Reader.get_decrees_count(pdf,))
         3
         """
+        from py_pdf_parser.components import PDFDocument
         if type(pdf) != PDFDocument: return None
-        page_first = pdf.get_page(1)
-        # Tests which texts are present in first page of decree pdf, extracts
-        # the text containing the decrees and counts the number of decrees.
-        if len([ele for ele in page_first.elements.filter_by_text_contains("Annonces")]) > 0:
-            raw = page_first.elements.between(page_first.elements.filter_by_text_contains("Naturalisations et réintégrations").extract_single_element(),page_first.elements.filter_by_text_contains("Annonces").extract_single_element())
+        # Decrees listed between the heading of the naturalizations and the
+        # announcements (see FirstPageInfo)
+        return FirstPageInfo.from_pdf(pdf).decrees
+
+
+def parse_person_records(decree_string:str) -> Iterator[PersonRecord]:
+    """Get the records of all the persons of a decree string.
+
+    Each person is parsed in one pass of a single precompiled pattern (see
+    PATTERN_RECORD), giving its name, birth date, birthplace, country of birth,
+    year and series of its dossier prefix, dossier number and department. The date of the decree is not known
+    from the decree string and is left empty.
+
+    Arguments
+    ----------
+    decree_string : str, required.
+        Text of the naturalization decrees (see Reader.get_decree_string method).
+
+    Yields
+    ------
+    PersonRecord:
+        Record of each person with a dossier number.
+
+
+    Example
+    -------
+    >>> print(next(parse_person_records(decree_string)))
+    PersonRecord('027', '123', 'VILLARREAL LARRAURI (Alejandro)', None, '013', 'Mexique', birth_date='14/02/1986', birthplace='Mexico')
+    """
+    for match in PATTERN_RECORD.finditer(decree_string):
+        record = _person_record(match)
+        if record is not None:
+            yield record
+
+def _person_record(match:re.Match) -> PersonRecord:
+    """Get the record of a person matched by PATTERN_RECORD (None if no dossier)."""
+    if match.group("serie") is None:
+        # Person not written as usual, parsed by parts
+        person = Reader._parse_person(match.group(0))
+        if person is None:
+            return None
+        year,serie,dossier,_,_,country = person
+        return PersonRecord(serie,dossier,match.group("name").strip(),None,match.group("dep"),country,year=year)
+    country = match.group("country").strip()
+    if country.isdigit():
+        # Born in a department of France
+        country = "France"
+    return PersonRecord(match.group("serie"),match.group("dossier").strip(),match.group("name").strip(),None,match.group("dep"),country,
+                        birth_date=match.group("birth_date"),birthplace=match.group("birthplace").strip(),year=match.group("year"))
+
+def _read_jo(pdf_path:str, profile:str=None, profile_path:str=None) -> tuple:
+    """Read a JO pdf file and parse its persons (worker of Reader.ingest).
+
+    The decree string and persons are None if the JO has no naturalization
+    decree (see Reader.probe).
+
+    Also gives the stages and counters added to the metrics registry while
+    reading the file, so that they can be merged from a worker process.
+    """
+    snapshot = metrics.snapshot()
+    with metrics.profile(pdf_path,profile,profile_path), metrics.stage("read_jo"):
+        info = Reader.probe(pdf_path)
+        if info["decrees"]:
+            decree_string = _probed_decree_string(pdf_path,info)
+            persons = Reader.parse_persons(decree_string)
         else:
-            raw = page_first.elements.after(page_first.elements.filter_by_text_contains("Naturalisations et réintégrations").extract_single_element())
-        decrees_found = len([ele for ele in raw if len(re.findall("portant naturalisation",re.sub(r"\s+|\t+"," ",ele.text())))])
-        return decrees_found
+            # Nothing to read in the JO
+            decree_string,persons = None,None
+            metrics.count("skipped")
+    metrics.count("jos")
+    return pdf_path,info["date"],decree_string,persons,metrics.since(snapshot)
 
+def _probed_decree_string(pdf_path:str, info:dict) -> str:
+    """Get the decree string of a JO probed (see Reader.probe), read page by page within the pages of the decrees."""
+    if not info["decrees"]:
+        return ""
+    page_texts = iter_page_texts(pdf_path,first_page=info["first_page"],last_page=info["last_page"])
+    return "".join(Reader.iter_decree_string(page_texts,END_MARKERS[info["end"]]))
 
 
 # class Analyser:
@@ -600,19 +1994,3 @@ class Reader:
 #         self.compare_decrees()
 #         def load_Reader(self):
 #             self.reader = Reader(file_decrees=self.file_decrees,file_decrees_string=self.file_decrees_string,file_nat=self.file_bat, year=self._year,save_path = self._save_path)
-            
-
-if __name__ == "__main__":
-    JOs_path = input("Please input the path for the folder containing all the JOs PDFs as downloaded from https://www.legifrance.gouv.fr")
-    if os.path.isdir(JOs_path):
-        first_name = str(input("Please input the first name of the person of interest"))
-        last_name = str(input("Please input the last name of the person of interest"))
-        serie = str(input("Please input the serie number of the person of interest (found on the dossier number given, e.g. 2020X 054, the number is 054, please include the '0' if appropriate)"))
-        if serie not in [f'{num:03}' for num in list(range(0,55))+[300,301,302,303,304,305]]:
-            print("The series number is invalid: must be between 0 and 54, or within special numbers (300-305). If series number is correct but still encounter this problem, please contact the developers. See github https://github.com/AlexVillarra/Naturalisation for contact.")
-        else:
-            main = Reader(first_name=first_name,last_name=last_name,JOs_path = JOs_path,serie=serie)
-            person = main.search_person(first_name=first_name,last_name=last_name,know_series=True)
-            print(person)
-    else:
-        print("The file path passed is not a directory")
\ No newline at end of file
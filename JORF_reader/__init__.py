@@ -2,4 +2,5 @@
 # -*- coding: utf-8 -*-
 
 import os
-from .JORF_reader import Reader
\ No newline at end of file
+from .JORF_reader import Reader, parse_person_records
+from .records import PersonRecord, NaturalizedStore
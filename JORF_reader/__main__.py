@@ -0,0 +1,29 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Look for a person interactively (python -m JORF_reader)."""
+
+import os
+import sys
+import logging
+from .JORF_reader import Reader, SERIES
+
+def main():
+    logging.basicConfig(level=logging.INFO,format="%(message)s")
+    JOs_path = input("Please input the path for the folder containing all the JOs PDFs as downloaded from https://www.legifrance.gouv.fr")
+    if not os.path.isdir(JOs_path):
+        print("The file path passed is not a directory")
+        return 1
+    first_name = str(input("Please input the first name of the person of interest"))
+    last_name = str(input("Please input the last name of the person of interest"))
+    serie = str(input("Please input the serie number of the person of interest (found on the dossier number given, e.g. 2020X 054, the number is 054, please include the '0' if appropriate)"))
+    if serie not in SERIES:
+        print("The series number is invalid: must be between 0 and 54, or within special numbers (300-305). If series number is correct but still encounter this problem, please contact the developers. See github https://github.com/AlexVillarra/Naturalisation for contact.")
+        return 1
+    reader = Reader(first_name=first_name,last_name=last_name,JOs_path=JOs_path,serie=serie)
+    person = reader.search_person(first_name=first_name,last_name=last_name,know_series=True)
+    print(person)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import codecs
+from array import array
+from collections import Counter
+from typing import Iterable, Iterator
+from .records import PersonRecord
+
+# Columns of the table, the categorical ones being stored as codes
+COLUMNS = ["year","serie","dossier","name","date","dep","country"]
+CATEGORICAL = ["year","serie","date","dep","country"]
+# Magic bytes of the table files
+MAGIC = b"JORFTAB1"
+
+class RecordTable:
+    """The columnar table of the naturalized persons, for analytics."""
+    def __init__(self, codes:dict, categories:dict, dossiers:list, names:list):
+        """Initialize a table from its columns
+
+        The year, serie, decree date, department and country columns are
+        categorical: each one is an array of codes (see array module) with the
+        list of its categories, so counting the persons by any of them only
+        goes through arrays of integers instead of the nested dictionaries of
+        the persons. Dossiers and names are kept as lists of strings. Tables
+        are usually made from records (see .from_records method).
+
+        Arguments
+        ----------
+        codes : dict, required.
+            Array of the codes of each categorical column (see CATEGORICAL).
+
+        categories : dict, required.
+            List of the categories of each categorical column.
+
+        dossiers : list, required.
+            Dossier number of each person.
+
+        names : list, required.
+            Name of each person.
+
+        Example
+        -------
+        >>> table = RecordTable.from_records(reader.naturalized)
+        >>> table.group_count("country",serie="027")
+        {('Mexique',): 154, ('Maroc',): 97}
+        """
+        self.codes = codes
+        self.categories = categories
+        self.dossiers = dossiers
+        self.names = names
+
+    @classmethod
+    def from_records(cls, records:Iterable[PersonRecord]) -> "RecordTable":
+        """Get the table of person records (e.g. a records.NaturalizedStore)."""
+        lookups = {column:{} for column in CATEGORICAL}
+        codes = {column:array("l") for column in CATEGORICAL}
+        dossiers,names = [],[]
+        for record in records:
+            for column in CATEGORICAL:
+                value = getattr(record,column)
+                lookup = lookups[column]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                codes[column].append(code)
+            dossiers.append(record.dossier)
+            names.append(record.name)
+        categories = {column:list(lookup) for column,lookup in lookups.items()}
+        return cls(codes,categories,dossiers,names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def column(self, name:str) -> list:
+        """Get the values of a column."""
+        if name == "dossier":
+            return list(self.dossiers)
+        if name == "name":
+            return list(self.names)
+        categories = self.categories[name]
+        return [categories[code] for code in self.codes[name]]
+
+    def __iter__(self) -> Iterator[PersonRecord]:
+        columns = [self.column(column) for column in CATEGORICAL]
+        for i,(year,serie,date,dep,country) in enumerate(zip(*columns)):
+            yield PersonRecord(serie,self.dossiers[i],self.names[i],date,dep,country,year=year)
+
+    def _wanted(self, conditions:dict) -> dict:
+        """Get the codes wanted for each categorical column of conditions."""
+        wanted = {}
+        for column,value in conditions.items():
+            if column not in CATEGORICAL:
+                raise ValueError(f"Unknown categorical column {column}, use one of {CATEGORICAL}")
+            values = value if isinstance(value,(list,tuple,set)) else [value]
+            lookup = {category:code for code,category in enumerate(self.categories[column])}
+            wanted[column] = {lookup[value] for value in values if value in lookup}
+        return wanted
+
+    def group_count(self, *columns:str, **conditions) -> dict:
+        """Count the persons by values of categorical columns.
+
+        The counts are made on the codes of the columns (with numpy if it is
+        installed), the values are only decoded for the groups found.
+
+        Arguments
+        ----------
+        *columns : str, required.
+            Categorical columns of the groups (see CATEGORICAL), e.g. "serie",
+            "date", "dep" or "country".
+
+        Keyword Arguments
+        ------------------
+        **conditions : optional.
+            Value (or list of values) of categorical columns of the persons
+            counted, e.g. year="2020" or serie=["027","028"].
+
+        Returns
+        -------
+        dict:
+            Number of persons of each group, keyed by the tuple of the values of
+            the columns, from the largest group.
+
+
+        Example
+        -------
+        >>> table.group_count("serie","dep",year="2020")
+        {('027', '013'): 41, ('027', '075'): 38}
+        """
+        if not columns:
+            raise ValueError(f"Give at least one column, among {CATEGORICAL}")
+        for column in columns:
+            if column not in CATEGORICAL:
+                raise ValueError(f"Unknown categorical column {column}, use one of {CATEGORICAL}")
+        wanted = self._wanted(conditions)
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None:
+            codes = {column:np.frombuffer(self.codes[column],dtype=np.dtype(f"i{self.codes[column].itemsize}")) for column in CATEGORICAL}
+            mask = np.ones(len(self),dtype=bool)
+            for column,values in wanted.items():
+                mask &= np.isin(codes[column],list(values))
+            # Single key of the groups (mixed radix of the codes)
+            key = np.zeros(int(mask.sum()),dtype=np.int64)
+            for column in columns:
+                key = key*len(self.categories[column])+codes[column][mask]
+            groups,counts = np.unique(key,return_counts=True)
+            found = {}
+            for group,count in zip(groups.tolist(),counts.tolist()):
+                values = []
+                for column in reversed(columns):
+                    group,code = divmod(group,len(self.categories[column]))
+                    values.append(self.categories[column][code])
+                found[tuple(reversed(values))] = count
+        else:
+            keys = zip(*(self.codes[column] for column in columns))
+            if wanted:
+                filters = [(self.codes[column],values) for column,values in wanted.items()]
+                keys = (key for i,key in enumerate(keys) if all(codes[i] in values for codes,values in filters))
+            found = {tuple(self.categories[column][code] for column,code in zip(columns,group)):count for group,count in Counter(keys).items()}
+        return dict(sorted(found.items(),key=lambda item: -item[1]))
+
+    def to_numpy(self):
+        """Get the table as a numpy structured array (numpy must be installed).
+
+        Returns
+        -------
+        numpy.ndarray:
+            One row per person, with the codes of the categorical columns
+            (categories in the categories attribute) and the dossiers and names.
+        """
+        import numpy as np
+        dtype = [(column,np.int32) for column in CATEGORICAL]+[("dossier",object),("name",object)]
+        table = np.empty(len(self),dtype=dtype)
+        for column in CATEGORICAL:
+            table[column] = np.frombuffer(self.codes[column],dtype=np.dtype(f"i{self.codes[column].itemsize}"))
+        table["dossier"] = self.dossiers
+        table["name"] = self.names
+        return table
+
+    def save(self, file_table:str):
+        """Save the table to a columnar file.
+
+        The file starts with a json header (categories, number of rows and
+        size of each column) followed by the columns one after the other: the
+        codes of the categorical columns as arrays of 32 bits integers, then
+        the dossiers and names as utf-8 text (one per line).
+
+        Arguments
+        ----------
+        file_table : str, required.
+            File path where the table is saved.
+        """
+        columns = [array("i",self.codes[column]).tobytes() for column in CATEGORICAL]
+        columns += ["\n".join(self.dossiers).encode("utf-8"),"\n".join(self.names).encode("utf-8")]
+        header = json.dumps({"rows":len(self),"categories":self.categories,"columns":CATEGORICAL+["dossier","name"],
+                             "sizes":[len(column) for column in columns]},ensure_ascii=False).encode("utf-8")
+        with open(file_table,"wb") as f:
+            f.write(MAGIC+len(header).to_bytes(8,"little")+header)
+            for column in columns:
+                f.write(column)
+
+    @classmethod
+    def load(cls, file_table:str) -> "RecordTable":
+        """Load a table saved by the .save method."""
+        with open(file_table,"rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{file_table} is not a table file")
+            header = json.loads(f.read(int.from_bytes(f.read(8),"little")).decode("utf-8"))
+            columns = [f.read(size) for size in header["sizes"]]
+        codes = {}
+        for column,data in zip(header["columns"],columns):
+            if column in CATEGORICAL:
+                codes[column] = array("i")
+                codes[column].frombytes(data)
+        dossiers,names = (data.decode("utf-8").split("\n") if header["rows"] else [] for data in columns[-2:])
+        return cls(codes,header["categories"],dossiers,names)
+
+    def to_csv(self, file_csv:str, encoded:bool=False):
+        """Write the table to a csv file.
+
+        Arguments
+        ----------
+        file_csv : str, required.
+            File path of the csv file.
+
+        Keyword Arguments
+        ------------------
+        encoded : bool, optional.
+            By default False.
+            Writes the codes of the categorical columns instead of their values
+            (the categories are then written to a json file next to it, named
+            as the csv file with a ".categories.json" extension).
+        """
+        import csv
+        columns = {column:(list(self.codes[column]) if encoded and column in CATEGORICAL else self.column(column)) for column in COLUMNS}
+        with codecs.open(file_csv,"w",encoding="utf-8") as f:
+            writer = csv.writer(f,lineterminator="\n")
+            writer.writerow(COLUMNS)
+            writer.writerows(zip(*(columns[column] for column in COLUMNS)))
+        if encoded:
+            with codecs.open(f"{file_csv}.categories.json","w",encoding="utf-8") as f:
+                json.dump(self.categories, f, ensure_ascii=False)
@@ -0,0 +1,47 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+from datetime import date
+
+# Months as written in the JO headers (compared without accents)
+MONTHS = {"janvier":1,"fevrier":2,"mars":3,"avril":4,"mai":5,"juin":6,"juillet":7,
+          "aout":8,"septembre":9,"octobre":10,"novembre":11,"decembre":12}
+# Date of a JO header, e.g. "Mercredi 23 juin 2021" or "Jeudi 1er juillet 2021"
+PATTERN_DATE = re.compile(r"\b([0-9]{1,2})\s*(?:er|ER)?\s+([^\W\d_]+)\s+([0-9]{4})\b", re.UNICODE)
+
+def parse_jo_date(header:str) -> str:
+    """Get the date of a JO from the header of its title page.
+
+    Only the French dates of the JO headers are understood (day, month name
+    and year, anything after a "/" being neglected), which is much faster than
+    a general purpose date parser.
+
+    Arguments
+    ----------
+    header : str, required.
+        Text of the header of the title page.
+
+    Returns
+    -------
+    str:
+        Date of the JO (dd/mm/YYYY), None if not understood.
+
+
+    Example
+    -------
+    >>> parse_jo_date("Jeudi 1er juillet 2021 / JOURNAL OFFICIEL DE LA RÉPUBLIQUE FRANÇAISE")
+    '01/07/2021'
+    """
+    found = PATTERN_DATE.search(header.split("/")[0])
+    if found is None:
+        return None
+    day,month,year = found.groups()
+    month = MONTHS.get(unicodedata.normalize("NFKD",month).encode("ascii","ignore").decode("ascii").lower())
+    if month is None:
+        return None
+    try:
+        return date(int(year),month,int(day)).strftime("%d/%m/%Y")
+    except ValueError:
+        return None
@@ -0,0 +1,222 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from typing import Iterator, TYPE_CHECKING
+from .metrics import metrics
+# The pdf libraries are long to import, they are only imported when a pdf file
+# is actually read.
+if TYPE_CHECKING:
+    from pdfminer.layout import LTTextBox
+    from py_pdf_parser.components import PDFDocument
+
+# Running title of the JO pages, neglected in the text of the pages (spaced
+# as in the text normalized by page_text, where spaces are never doubled)
+HEADER = "JOURNAL OFFICIEL DE LA RÉPUBLIQUE FRANÇAISE "
+# Number of loaded title pages kept in memory
+CACHE_SIZE = 2
+_first_pages = OrderedDict()
+
+def file_key(pdf_path:str) -> tuple:
+    """Key identifying a file in its current version.
+
+    Arguments
+    ----------
+    pdf_path : str, required.
+        Path to the file.
+
+    Returns
+    -------
+    tuple:
+        Absolute path, size and modification time of the file.
+    """
+    stat = os.stat(pdf_path)
+    return os.path.abspath(pdf_path),stat.st_size,stat.st_mtime_ns
+
+def _remember(cache:OrderedDict,key:tuple,pdf:"PDFDocument"):
+    """Store a loaded title page and drop the oldest ones above CACHE_SIZE."""
+    cache[key] = pdf
+    cache.move_to_end(key)
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+
+def load_first_page(pdf_path:str) -> "PDFDocument":
+    """Load only the title page of a pdf file.
+
+    Only the first page goes through the layout analysis, which makes it a cheap
+    probe for the date or the decree count of a JO. The title page is kept in
+    memory as long as the file does not change (same path, size and
+    modification time).
+
+    Arguments
+    ----------
+    pdf_path : str, required.
+        Path to the pdf file.
+
+    Returns
+    -------
+    PDFDocument:
+        Loaded PDF object from py_pdf_parser library (with page 1 only).
+
+
+    Example
+    -------
+    >>> pdf = load_first_page(pdf_path)
+    >>> pdf.page_numbers
+    [1]
+    """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextBox
+    from py_pdf_parser import loaders
+    from py_pdf_parser.components import PDFDocument
+    key = file_key(pdf_path)
+    if key in _first_pages:
+        _first_pages.move_to_end(key)
+        return _first_pages[key]
+    pages = {}
+    with metrics.stage("first_page"), open(pdf_path,"rb") as f:
+        for page in extract_pages(f,laparams=LAParams(boxes_flow=None),page_numbers=[0],maxpages=1):
+            elements = [ele for ele in page if isinstance(ele,LTTextBox)]
+            if elements:
+                pages[1] = loaders.Page(width=page.width,height=page.height,elements=elements)
+        pdf = PDFDocument(pages=pages,pdf_file_path=pdf_path)
+    metrics.count("pages")
+    _remember(_first_pages,key,pdf)
+    return pdf
+
+def clear_cache():
+    """Release all the loaded title pages."""
+    _first_pages.clear()
+
+def page_text(elements:list) -> str:
+    """Join the normalized text of the elements of a page.
+
+    Arguments
+    ----------
+    elements : list, required.
+        Text elements of the page, ordered from top to bottom and left to right
+        (as ordered by py_pdf_parser).
+
+    Returns
+    -------
+    str:
+        Text of the page on a single line, without the running title.
+    """
+    return " ".join([re.sub(r"\s+|\t+|\n"," ",ele.text()).strip() for ele in elements]).split(HEADER)[-1]
+
+class _Element:
+    """Text element of a page streamed from pdfminer (same text as py_pdf_parser)."""
+    __slots__ = ("_text",)
+    def __init__(self, element:"LTTextBox"):
+        self._text = element.get_text()
+
+    def text(self) -> str:
+        return self._text.strip()
+
+def iter_page_texts(pdf_path:str, first_page:int=2, last_page:int=None) -> Iterator[str]:
+    """Yield the text of the pages of a pdf file one page at a time.
+
+    The pages go through the layout analysis only when their text is asked
+    for, so only one page is in memory at a time and the pages after the last
+    one needed are never analysed. Pages without text are skipped.
+
+    Arguments
+    ----------
+    pdf_path : str, required.
+        Path to the pdf file.
+
+    Keyword Arguments
+    ------------------
+    first_page : int, optional.
+        By default 2.
+        Number of the first page (starting at 1) to be read.
+
+    last_page : int, optional.
+        By default None.
+        Number of the last page to be read (the pages after it are not even
+        listed). If None, the pages are read until the end of the file.
+
+    Yields
+    ------
+    str:
+        Text of each page (see page_text).
+
+
+    Example
+    -------
+    >>> for text in iter_page_texts(pdf_path):
+    ...     print(len(text))
+    """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextBox
+    with open(pdf_path,"rb") as f:
+        pages = extract_pages(f,laparams=LAParams(boxes_flow=None),page_numbers=range(first_page-1,last_page or sys.maxsize),maxpages=last_page or 0)
+        while True:
+            # Pages are laid out when asked for, only this time is counted
+            start = time.perf_counter()
+            page = next(pages,None)
+            if page is None:
+                break
+            elements = sorted((ele for ele in page if isinstance(ele,LTTextBox)),key=lambda ele: (-ele.y0,ele.x0))
+            text = page_text([_Element(ele) for ele in elements]) if elements else None
+            metrics.add_time("page_layout",time.perf_counter()-start)
+            metrics.count("pages")
+            if text is not None:
+                yield text
+
+def outline(pdf_path:str) -> list:
+    """Get the outline (bookmarks) of a pdf file with the page of each entry.
+
+    Only the outline and the page tree are read, no page goes through the
+    layout analysis. Entries whose destination is not a page are left out.
+
+    Arguments
+    ----------
+    pdf_path : str, required.
+        Path to the pdf file.
+
+    Returns
+    -------
+    list:
+        Tuples (level, title, page number starting at 1) in the order of the
+        outline, empty if the file has no outline.
+
+
+    Example
+    -------
+    >>> print(outline(pdf_path)[0])
+    (1, 'Ministère de l’intérieur', 5)
+    """
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument, PDFNoOutlines, PDFDestinationNotFound
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import PDFObjRef, resolve1
+    from pdfminer.psparser import PSLiteral
+    entries = []
+    with metrics.stage("outline"), open(pdf_path,"rb") as f:
+        document = PDFDocument(PDFParser(f))
+        try:
+            items = list(document.get_outlines())
+        except PDFNoOutlines:
+            return entries
+        pages = {page.pageid:number for number,page in enumerate(PDFPage.create_pages(document),1)}
+        for level,title,dest,action,_ in items:
+            action = resolve1(action)
+            if (dest is None) and isinstance(action,dict) and (getattr(action.get("S"),"name",None) == "GoTo"):
+                dest = action.get("D")
+            dest = resolve1(dest)
+            if isinstance(dest,(PSLiteral,str,bytes)):
+                # Named destination
+                try:
+                    dest = resolve1(document.get_dest(dest.name if isinstance(dest,PSLiteral) else dest))
+                except (KeyError,PDFDestinationNotFound):
+                    continue
+            if isinstance(dest,dict):
+                dest = resolve1(dest.get("D"))
+            if isinstance(dest,list) and dest and isinstance(dest[0],PDFObjRef) and (dest[0].objid in pages):
+                entries.append((level,title,pages[dest[0].objid]))
+    return entries
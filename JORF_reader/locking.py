@@ -0,0 +1,164 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Sharing of a results folder between several Readers (e.g. processes).
+
+The files of the results are always written to a temporary file of their
+folder and renamed over the old one (see atomic_write), so that a file is
+never seen half-written and reading needs no lock. Readers saving results take
+the advisory lock of the folder (see ResultsLock), and a generation number
+written next to the results tells the other Readers when their stores are
+outdated.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import IO, Iterator
+from .metrics import written
+
+# Lock file and generation file of a results folder
+LOCK = ".lock"
+GENERATION = ".generation"
+# Tries (every 50 ms) to rename a file over one opened by another process
+# (refused on Windows)
+REPLACE_TRIES = 40
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(f:IO):
+        f.seek(0)
+        while True:
+            try:
+                # Gives up after 10 s, tried again until locked
+                msvcrt.locking(f.fileno(),msvcrt.LK_LOCK,1)
+                return
+            except OSError:
+                continue
+
+    def _unlock(f:IO):
+        f.seek(0)
+        msvcrt.locking(f.fileno(),msvcrt.LK_UNLCK,1)
+else:
+    import fcntl
+
+    def _lock(f:IO):
+        fcntl.flock(f.fileno(),fcntl.LOCK_EX)
+
+    def _unlock(f:IO):
+        fcntl.flock(f.fileno(),fcntl.LOCK_UN)
+
+def _replace(source:str, target:str):
+    """Rename a file over another one."""
+    for attempt in range(REPLACE_TRIES):
+        try:
+            os.replace(source,target)
+            return
+        except PermissionError:
+            if attempt == REPLACE_TRIES-1:
+                raise
+            time.sleep(0.05)
+
+@contextmanager
+def atomic_write(file_path:str, mode:str="w") -> Iterator[IO]:
+    """Open a file to be written as a whole, replacing the old one at once.
+
+    The file is written to a temporary file of the same folder, renamed over
+    file_path once closed (left untouched if the writing fails). Text files
+    are written in utf-8.
+
+    Arguments
+    ----------
+    file_path : str, required.
+        File path of the file written.
+
+    Keyword Arguments
+    ------------------
+    mode : str, optional.
+        By default "w".
+        Mode of the file, "w" or "wb".
+
+    Example
+    -------
+    >>> with atomic_write(r"results\\info.json") as f:
+    >>>     json.dump(info, f)
+    """
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path,mode,encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+        _replace(temp_path,file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    written(file_path)
+
+class ResultsLock:
+    """The advisory lock and generation of a results folder."""
+    def __init__(self, save_path:str):
+        """Initialize the lock of a results folder
+
+        Only one Reader at a time holds the lock of the folder (fcntl lock on
+        POSIX systems, msvcrt lock on Windows, released by the system if the
+        process dies). The generation number of the results is odd while a
+        Reader writes them, and increased to the next even number once they
+        are written, so Readers can tell whether they loaded consistent results
+        without taking the lock.
+
+        Arguments
+        ----------
+        save_path : str, required.
+            Path to the results folder.
+
+        Example
+        -------
+        >>> lock = ResultsLock(r"results")
+        >>> with lock.write() as generation:
+        >>>     reader.manifest.save()
+        """
+        self._file_lock = os.path.join(save_path,LOCK)
+        self._file_generation = os.path.join(save_path,GENERATION)
+        self._handle = None
+
+    @property
+    def locked(self) -> bool:
+        """True while the lock is held by this object."""
+        return self._handle is not None
+
+    def generation(self) -> int:
+        """Get the generation of the results (0 if never written)."""
+        try:
+            with open(self._file_generation,encoding="utf-8") as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError,ValueError):
+            return 0
+
+    def _set_generation(self, generation:int):
+        with atomic_write(self._file_generation) as f:
+            f.write(str(generation))
+
+    @contextmanager
+    def write(self) -> Iterator[int]:
+        """Hold the lock while writing the results (waits for the other writers).
+
+        Yields the generation of the results found once locked (odd if a
+        writer died while writing them).
+        """
+        handle = open(self._file_lock,"a+b")
+        try:
+            _lock(handle)
+            self._handle = handle
+            found = self.generation()
+            writing = found+1+found % 2
+            self._set_generation(writing)
+            try:
+                yield found
+            finally:
+                self._set_generation(writing+1)
+        finally:
+            if self._handle is not None:
+                _unlock(handle)
+            self._handle = None
+            handle.close()
@@ -0,0 +1,219 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import codecs
+import hashlib
+from typing import Iterable
+from .locking import atomic_write
+
+# Extraction stages of a JO: decree string read from the pdf, and persons
+# parsed from the decree string.
+STAGES = ["text","persons"]
+# Version of the title page probe of the JOs recorded without naturalization
+# before it was kept
+FIRST_PROBE_VERSION = "1"
+
+def file_digest(pdf_path:str) -> str:
+    """Get the content hash (sha256) of a file."""
+    sha = hashlib.sha256()
+    with open(pdf_path,"rb") as f:
+        for block in iter(lambda: f.read(1 << 20),b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+class Manifest:
+    """The ingestion manifest keeping track of the JOs already processed."""
+    def __init__(self, file_manifest:str, parser_version:str, probe_version:str=FIRST_PROBE_VERSION):
+        """Initialize the ingestion manifest
+
+        The manifest is keyed by the content hash (sha256) of each JO pdf file,
+        so renamed or moved files are recognised. Each entry records the path,
+        size and modification time of the file (to avoid hashing unchanged
+        files), the date of the decree, the extraction stages finished and the
+        parser version used for the persons stage. JOs without naturalization
+        decrees record the version of the title page probe instead.
+
+        Arguments
+        ----------
+        file_manifest : str, required.
+            File path where the manifest json file is stored.
+
+        parser_version : str, required.
+            Version of the persons parser. Entries with another version need
+            the persons stage to be done again.
+
+        Keyword Arguments
+        ------------------
+        probe_version : str, optional.
+            By default FIRST_PROBE_VERSION.
+            Version of the title page probe. JOs recorded without
+            naturalization with another version need to be probed again.
+
+        Example
+        -------
+        >>> manifest = Manifest(r"results\\manifest.json",parser_version="1")
+        """
+        self._file_manifest = file_manifest
+        self.parser_version = parser_version
+        self.probe_version = probe_version
+        if os.path.isfile(file_manifest):
+            with codecs.open(file_manifest, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = {}
+        # Index of the known files by path
+        self._paths = {entry["path"]:digest for digest,entry in self.entries.items()}
+
+    def __contains__(self, digest:str) -> bool:
+        return digest in self.entries
+
+    def get(self, digest:str) -> dict:
+        """Get the entry of a JO, None if not in the manifest."""
+        return self.entries.get(digest)
+
+    def known(self, pdf_path:str) -> str:
+        """Get the content hash of a JO pdf file recorded with the same path, size and modification time (None if it must be hashed)."""
+        stat = os.stat(pdf_path)
+        digest = self._paths.get(pdf_path)
+        if digest is not None:
+            entry = self.entries[digest]
+            if (entry["size"] == stat.st_size) and (entry["mtime"] == stat.st_mtime_ns):
+                return digest
+        return None
+
+    def identify(self, pdf_path:str, digest:str=None) -> str:
+        """Get the content hash of a JO pdf file.
+
+        The file is only hashed if its path, size or modification time differ
+        from the ones recorded in the manifest.
+
+        Arguments
+        ----------
+        pdf_path : str, required.
+            Path to the pdf file.
+
+        Keyword Arguments
+        ------------------
+        digest : str, optional.
+            By default None.
+            Content hash of the file if already computed (see file_digest).
+
+        Returns
+        -------
+        str:
+            Content hash (sha256) of the file.
+        """
+        known = self.known(pdf_path)
+        if known is not None:
+            return known
+        stat = os.stat(pdf_path)
+        if digest is None:
+            digest = file_digest(pdf_path)
+        entry = self.entries.get(digest)
+        if entry is not None:
+            # Same content under another path (renamed or moved file)
+            self._paths.pop(entry["path"],None)
+            entry.update({"path":pdf_path,"size":stat.st_size,"mtime":stat.st_mtime_ns})
+            self._paths[pdf_path] = digest
+        return digest
+
+    def missing_stages(self, digest:str) -> list:
+        """Get the extraction stages still to be done for a JO.
+
+        Arguments
+        ----------
+        digest : str, required.
+            Content hash of the JO pdf file.
+
+        Returns
+        -------
+        list:
+            Stages (see STAGES) not finished, or done with an older parser
+            version (or probe version, for a JO without naturalization).
+        """
+        entry = self.entries.get(digest)
+        if entry is None:
+            return list(STAGES)
+        if entry.get("decrees") == 0:
+            # Nothing parsed in a JO without naturalization
+            return [] if entry.get("probe_version",FIRST_PROBE_VERSION) == self.probe_version else list(STAGES)
+        done = set(entry["stages"])
+        if entry.get("parser_version") != self.parser_version:
+            done.discard("persons")
+        return [stage for stage in STAGES if stage not in done]
+
+    def record(self, digest:str, pdf_path:str, date:str, stage:str):
+        """Record an extraction stage as finished for a JO.
+
+        Arguments
+        ----------
+        digest : str, required.
+            Content hash of the JO pdf file.
+
+        pdf_path : str, required.
+            Path to the pdf file.
+
+        date : str, required.
+            Date of the decree.
+
+        stage : str, required.
+            Stage finished (see STAGES).
+        """
+        stat = os.stat(pdf_path)
+        entry = self.entries.setdefault(digest,{"stages":[]})
+        self._paths.pop(entry.get("path"),None)
+        entry.update({"path":pdf_path,"size":stat.st_size,"mtime":stat.st_mtime_ns,"date":date})
+        # No longer known as a JO without naturalization (see .skip method)
+        entry.pop("decrees",None)
+        entry.pop("probe_version",None)
+        if stage not in entry["stages"]:
+            entry["stages"].append(stage)
+        if stage == "persons":
+            entry["parser_version"] = self.parser_version
+        self._paths[pdf_path] = digest
+
+    def parsed(self, dates:Iterable[str]):
+        """Record the persons stage as done with the current parser version for the JOs of dates.
+
+        Only the JOs whose decree string is known are updated, and their pdf
+        files are not read (e.g. after the persons of all the decree strings
+        were parsed again, see Reader.reindex).
+
+        Arguments
+        ----------
+        dates : Iterable[str], required.
+            Dates of the decrees parsed.
+        """
+        dates = set(dates)
+        for entry in self.entries.values():
+            if (entry.get("date") in dates) and ("text" in entry["stages"]):
+                if "persons" not in entry["stages"]:
+                    entry["stages"].append("persons")
+                entry["parser_version"] = self.parser_version
+
+    def skip(self, digest:str, pdf_path:str, date:str):
+        """Record a JO without naturalization decrees (all its stages are finished, until the probe version changes).
+
+        Arguments
+        ----------
+        digest : str, required.
+            Content hash of the JO pdf file.
+
+        pdf_path : str, required.
+            Path to the pdf file.
+
+        date : str, required.
+            Date of the JO.
+        """
+        for stage in STAGES:
+            self.record(digest,pdf_path,date,stage)
+        self.entries[digest].update({"decrees":0,"probe_version":self.probe_version})
+
+    def save(self):
+        """Save the manifest to its json file."""
+        # A copy, as JOs may be planned meanwhile (see Reader.watch)
+        entries = dict(self.entries)
+        with atomic_write(self._file_manifest) as f:
+            json.dump(entries, f, ensure_ascii=False)
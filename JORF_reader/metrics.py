@@ -0,0 +1,210 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import cProfile
+import threading
+import tracemalloc
+from functools import wraps
+from contextlib import contextmanager
+
+# Counters giving the throughput of the stages of the run report (counter,
+# stage, name of the rate)
+RATES = [("pages","read_jo","pages_per_second"),
+         ("persons","parse_persons","persons_per_second"),
+         ("lookups","search_person","lookups_per_second")]
+
+class Metrics:
+    """The registry of the stage timers and counters of a run."""
+    def __init__(self):
+        """Initialize an empty registry
+
+        Each stage keeps the number of calls and the time spent in it (stages
+        may be nested, e.g. parse_persons within read_jo, but a stage called
+        again within itself in the same thread is only timed once), and each
+        counter keeps a number of items (pages, persons, bytes written, ...).
+        Files may also be profiled one by one (see .profile method). Stages and
+        counters may be recorded from several threads.
+
+        Example
+        -------
+        >>> metrics = Metrics()
+        >>> with metrics.stage("read_pdf"):
+        ...     metrics.count("pages",12)
+        >>> metrics.report()["stages"]["read_pdf"]["calls"]
+        1
+        """
+        self.stages = {}
+        self.counters = {}
+        self.files = {}
+        # Stages being timed, by thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start = time.time()
+
+    def reset(self):
+        """Forget all the stages, counters and files."""
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.files.clear()
+            self._start = time.time()
+
+    @contextmanager
+    def stage(self, name:str):
+        """Time a stage (context manager)."""
+        active = getattr(self._local,"active",None)
+        if active is None:
+            active = self._local.active = set()
+        if name in active:
+            yield
+            return
+        active.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            active.discard(name)
+            self.add_time(name,time.perf_counter()-start)
+
+    def add_time(self, name:str, seconds:float, calls:int=1):
+        """Add the time of calls of a stage."""
+        with self._lock:
+            stage = self.stages.setdefault(name,{"calls":0,"seconds":0.0})
+            stage["calls"] += calls
+            stage["seconds"] += seconds
+
+    def count(self, name:str, items:int=1):
+        """Add items to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name,0)+items
+
+    @contextmanager
+    def profile(self, pdf_path:str, profile:str=None, profile_path:str=None):
+        """Profile the processing of a file (context manager).
+
+        The time of the file is always kept. With "tracemalloc", the peak
+        memory of the file is kept too. With "cprofile", the profile of the
+        file is written to profile_path (pstats file named as the pdf file).
+
+        Arguments
+        ----------
+        pdf_path : str, required.
+            Path to the file processed.
+
+        Keyword Arguments
+        ------------------
+        profile : str, optional.
+            By default None.
+            Profiler used, None, "cprofile" or "tracemalloc".
+
+        profile_path : str, optional.
+            By default None.
+            Folder where the cProfile files are written (current folder if None).
+        """
+        entry = self.files.setdefault(pdf_path,{})
+        profiler = None
+        traced = (profile == "tracemalloc") and not tracemalloc.is_tracing()
+        if profile == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = time.perf_counter()-start
+            if profiler is not None:
+                profiler.disable()
+                profile_path = profile_path or os.getcwd()
+                if not os.path.isdir(profile_path):
+                    os.makedirs(profile_path)
+                entry["profile"] = os.path.join(profile_path,os.path.splitext(os.path.basename(pdf_path))[0]+".prof")
+                profiler.dump_stats(entry["profile"])
+            elif traced:
+                entry["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def snapshot(self) -> dict:
+        """Get a copy of the stages, counters and files, and the time it was taken (see .since and .merge methods)."""
+        with self._lock:
+            return {"stages":{name:dict(stage) for name,stage in self.stages.items()},"counters":dict(self.counters),
+                    "files":{path:dict(entry) for path,entry in self.files.items()},"time":time.time()}
+
+    def since(self, snapshot:dict) -> dict:
+        """Get what was added since a snapshot (e.g. by one file in a worker process)."""
+        current = self.snapshot()
+        stages = {}
+        for name,stage in current["stages"].items():
+            before = snapshot["stages"].get(name,{"calls":0,"seconds":0.0})
+            if stage["calls"] != before["calls"]:
+                stages[name] = {"calls":stage["calls"]-before["calls"],"seconds":stage["seconds"]-before["seconds"]}
+        counters = {name:items-snapshot["counters"].get(name,0) for name,items in current["counters"].items() if items != snapshot["counters"].get(name,0)}
+        files = {path:entry for path,entry in current["files"].items() if entry != snapshot["files"].get(path)}
+        return {"stages":stages,"counters":counters,"files":files}
+
+    def merge(self, other:dict):
+        """Add the stages, counters and files of another registry (see .since method)."""
+        for name,stage in other["stages"].items():
+            self.add_time(name,stage["seconds"],stage["calls"])
+        for name,items in other["counters"].items():
+            self.count(name,items)
+        with self._lock:
+            self.files.update(other["files"])
+
+    def report(self, since:dict=None) -> dict:
+        """Get the run report.
+
+        Keyword Arguments
+        ------------------
+        since : dict, optional.
+            By default None.
+            Snapshot of the registry (see .snapshot method) the run started
+            from, e.g. when a Reader was created. If None, the run started when
+            the registry was created or reset.
+
+        Returns
+        -------
+        dict:
+            Start and duration of the run, stages, counters, throughputs (see
+            RATES) and files profiled.
+        """
+        if since is None:
+            current,start = self.snapshot(),self._start
+        else:
+            current,start = self.since(since),since["time"]
+        stages,counters,files = current["stages"],current["counters"],current["files"]
+        rates = {}
+        for counter,stage,rate in RATES:
+            seconds = stages.get(stage,{}).get("seconds",0.0)
+            if (counter in counters) and seconds:
+                rates[rate] = counters[counter]/seconds
+        return {"started":time.strftime("%Y-%m-%dT%H:%M:%S",time.localtime(start)),"seconds":time.time()-start,
+                "stages":stages,"counters":counters,"rates":rates,"files":files}
+
+    def save(self, file_report:str, since:dict=None):
+        """Write the run report to a json file (see .report method)."""
+        # locking counts the bytes written within the registry
+        from .locking import atomic_write
+        with atomic_write(file_report) as f:
+            json.dump(self.report(since), f, ensure_ascii=False, indent=2)
+
+# Registry of the current process
+metrics = Metrics()
+
+def timed(name:str):
+    """Decorator timing each call of a function as a stage of the registry."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(name):
+                return function(*args,**kwargs)
+        return wrapper
+    return decorator
+
+def written(file_path:str):
+    """Count the bytes of a file just written."""
+    metrics.count("bytes_written",os.path.getsize(file_path))
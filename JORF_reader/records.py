@@ -0,0 +1,542 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Iterable, Iterator
+# jellyfish is only imported by the fuzzy search, so that exact lookups start fast
+
+# Query modes of the name index
+MODES = ["exact","prefix","substring"]
+# Year of the dossiers (2020X prefix) found before the year was parsed
+DEFAULT_YEAR = "2020"
+
+def normalize_name(text:str) -> str:
+    """Normalize a name: no accents, case-folded, and only single spaces between words.
+
+    Example
+    -------
+    >>> normalize_name("  N’DIAYE-Mbengue (Léa)")
+    'n diaye mbengue lea'
+    """
+    if not text.isascii():
+        text = "".join(char for char in unicodedata.normalize("NFKD",text) if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[\W_]+"," ",text.casefold()).split())
+
+def split_name(name:str) -> tuple:
+    """Split a name as published in the JO into last name and first names.
+
+    Example
+    -------
+    >>> split_name("VILLARREAL LARRAURI (Alejandro)")
+    ('VILLARREAL LARRAURI', 'Alejandro')
+    """
+    last = name.split("(")[0].strip().strip(",")
+    first = name.split("(")[-1].strip(")").strip(",").strip()
+    return last,first
+
+class PersonRecord:
+    """The record of a naturalized person (birth date and birthplace only known when parsed).
+
+    A person is identified by the year and serie of its dossier prefix (e.g.
+    2020X 027), its dossier number and its name.
+    """
+    __slots__ = ("serie","dossier","name","date","dep","country","birth_date","birthplace","year")
+    def __init__(self, serie:str, dossier:str, name:str, date:str, dep:str, country:str, birth_date:str=None, birthplace:str=None, year:str=DEFAULT_YEAR):
+        self.year = year
+        self.serie = serie
+        self.dossier = dossier
+        self.name = name
+        self.date = date
+        self.dep = dep
+        self.country = country
+        self.birth_date = birth_date
+        self.birthplace = birthplace
+
+    def __repr__(self) -> str:
+        birth = "" if (self.birth_date is None) and (self.birthplace is None) else f", birth_date={self.birth_date!r}, birthplace={self.birthplace!r}"
+        year = "" if self.year == DEFAULT_YEAR else f", year={self.year!r}"
+        return f"PersonRecord({self.serie!r}, {self.dossier!r}, {self.name!r}, {self.date!r}, {self.dep!r}, {self.country!r}{birth}{year})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other,PersonRecord) and all(getattr(self,slot) == getattr(other,slot) for slot in self.__slots__)
+
+    def to_dict(self) -> dict:
+        """Get the information of the person as given by Reader.search_person.
+
+        Example
+        -------
+        >>> record.to_dict()
+        {'VILLARREAL LARRAURI (Alejandro)': {'date': '23/06/2021'}, 'dep': '013', 'country': 'Mexique'}
+        """
+        return {self.name:{"date":self.date},"dep":self.dep,"country":self.country}
+
+class _FuzzyKeys:
+    """Blocking of normalized names to find the ones close to a query.
+
+    Names are compared without spaces (OCR spacing issues), and each word of a
+    name is also compared on its own (one of several first names). Candidates
+    are the names sharing a phonetic key (metaphone) with the query or one of
+    its words, and the names sharing enough trigrams with the query to be
+    within the maximum distance. Only candidates are compared to the query.
+    """
+    def __init__(self):
+        self._keys = {}
+        self._codes = {}
+        self._grams = {}
+
+    @staticmethod
+    def _entry(candidate) -> str:
+        """Name (or word of a name) of a candidate."""
+        return candidate
+
+    @staticmethod
+    def _entries(key:str) -> set:
+        words = key.split()
+        return {key.replace(" ","")} | (set(words) if len(words) > 1 else set())
+
+    @classmethod
+    def distance(cls, query:str, key:str) -> int:
+        """Distance between a normalized query and a normalized name (or one of its words)."""
+        import jellyfish
+        compact = query.replace(" ","")
+        return min(jellyfish.damerau_levenshtein_distance(compact,entry) for entry in cls._entries(key))
+
+    def add(self, key:str):
+        import jellyfish
+        for entry in self._entries(key):
+            if entry not in self._keys:
+                self._keys[entry] = []
+                self._codes.setdefault(jellyfish.metaphone(entry),set()).add(entry)
+                for gram in _KeyIndex._trigrams(entry):
+                    self._grams.setdefault(gram,set()).add(entry)
+            self._keys[entry].append(key)
+
+    def search(self, query:str, max_distance:int) -> dict:
+        """Get the names within max_distance (Damerau-Levenshtein) of the normalized query."""
+        import jellyfish
+        compact = query.replace(" ","")
+        candidates = set()
+        for entry in self._entries(query):
+            candidates |= self._codes.get(jellyfish.metaphone(entry),set())
+        # Each edit changes at most 3 trigrams of the query (short names must
+        # share at least one trigram with the query)
+        grams = _KeyIndex._trigrams(compact)
+        needed = max(len(grams)-3*max_distance,1)
+        hits = {}
+        for gram in grams:
+            for candidate in self._grams.get(gram,()):
+                hits[candidate] = hits.get(candidate,0)+1
+        candidates.update(candidate for candidate,count in hits.items() if count >= needed)
+        if not grams:
+            candidates.update(candidate for candidate in self._keys if len(self._entry(candidate)) <= len(compact)+max_distance)
+        found = {}
+        for candidate in candidates:
+            entry = self._entry(candidate)
+            if abs(len(entry)-len(compact)) > max_distance:
+                continue
+            distance = jellyfish.damerau_levenshtein_distance(compact,entry)
+            if distance <= max_distance:
+                for key in self._keys[candidate]:
+                    found[key] = min(distance,found.get(key,distance))
+        return found
+
+class _KeyIndex:
+    """Index of normalized names to record ids (exact, prefix, substring and fuzzy)."""
+    def __init__(self):
+        self._ids = {}
+        self._keys = []
+        self._sorted = True
+        self._grams = {}
+        self._fuzzy = None
+
+    def add(self, key:str, record_id:int):
+        ids = self._ids.get(key)
+        if ids is None:
+            ids = self._ids[key] = []
+            # Keys are only sorted again when a prefix is looked for
+            self._keys.append(key)
+            self._sorted = False
+            for gram in self._trigrams(key):
+                self._grams.setdefault(gram,set()).add(key)
+            if self._fuzzy is not None:
+                self._fuzzy.add(key)
+        ids.append(record_id)
+
+    @staticmethod
+    def _trigrams(key:str) -> set:
+        return {key[i:i+3] for i in range(len(key)-2)}
+
+    def search(self, query:str, mode:str) -> set:
+        """Get the ids of the records whose key matches the normalized query."""
+        if mode == "exact":
+            return set(self._ids.get(query,[]))
+        if mode == "prefix":
+            if not self._sorted:
+                self._keys.sort()
+                self._sorted = True
+            keys = []
+            for i in range(bisect_left(self._keys,query),len(self._keys)):
+                if not self._keys[i].startswith(query):
+                    break
+                keys.append(self._keys[i])
+        else:
+            grams = self._trigrams(query)
+            if grams:
+                # Keys containing all the trigrams of the query are candidates
+                postings = sorted((self._grams.get(gram,set()) for gram in grams),key=len)
+                candidates = set.intersection(*postings)
+            else:
+                candidates = self._keys
+            keys = [key for key in candidates if query in key]
+        return {record_id for key in keys for record_id in self._ids[key]}
+
+    def fuzzy_search(self, query:str, max_distance:int) -> dict:
+        """Get the ids of the records whose key is close to the query, with their distance."""
+        if self._fuzzy is None:
+            # Phonetic and trigram blocking is only built when first needed
+            self._fuzzy = _FuzzyKeys()
+            for key in self._ids:
+                self._fuzzy.add(key)
+        return {record_id:distance for key,distance in self._fuzzy.search(query,max_distance).items() for record_id in self._ids[key]}
+
+class NameIndex:
+    """The index of the naturalized persons by last name and first names."""
+    def __init__(self, records:Iterator[PersonRecord]=()):
+        """Initialize the name index
+
+        Last names and first names are normalized (see normalize_name) and
+        indexed, to look for persons across all the series without scanning all
+        the records.
+
+        Keyword Arguments
+        ------------------
+        records : Iterator[PersonRecord], optional.
+            By default ().
+            Records to be indexed.
+
+        Example
+        -------
+        >>> index = NameIndex(naturalized)
+        >>> index.search(last_name="villarreal",first_name="alejandro",mode="prefix")
+        [PersonRecord('027', '123', 'VILLARREAL LARRAURI (Alejandro)', '23/06/2021', '013', 'Mexique')]
+        """
+        self._records = []
+        self._positions = {}
+        self._last = _KeyIndex()
+        self._first = _KeyIndex()
+        for record in records:
+            self.add(record)
+
+    def add(self, record:PersonRecord):
+        """Index a record (replacing the record of the same name in the same dossier)."""
+        key = (record.year,record.serie,record.dossier,record.name)
+        if key in self._positions:
+            self._records[self._positions[key]] = record
+            return
+        record_id = self._positions[key] = len(self._records)
+        self._records.append(record)
+        last,first = split_name(record.name)
+        self._last.add(normalize_name(last),record_id)
+        self._first.add(normalize_name(first),record_id)
+
+    def search(self, last_name:str="", first_name:str="", mode:str="substring", serie:str=None, year:str=None) -> list:
+        """Look for persons by last name and/or first names.
+
+        Keyword Arguments
+        ------------------
+        last_name : str, optional.
+            By default "".
+            Last name of the person (ignored if empty).
+
+        first_name : str, optional.
+            By default "".
+            First names of the person (ignored if empty).
+
+        mode : str, optional.
+            By default "substring".
+            How names are matched: "exact", "prefix" or "substring" (see MODES).
+
+        serie : str, optional.
+            By default None.
+            Serie of the person, all series are searched if None.
+
+        year : str, optional.
+            By default None.
+            Year of the dossier of the person, all years are searched if None.
+
+        Returns
+        -------
+        list:
+            Records found, in the order they were indexed.
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        found = None
+        for query,index in ((normalize_name(last_name),self._last),(normalize_name(first_name),self._first)):
+            if not query:
+                continue
+            ids = index.search(query,mode)
+            found = ids if found is None else found & ids
+        if found is None:
+            found = range(len(self._records))
+        records = [self._records[record_id] for record_id in sorted(found)]
+        if serie is not None:
+            records = [record for record in records if record.serie == serie]
+        if year is not None:
+            records = [record for record in records if record.year == year]
+        return records
+
+    def fuzzy_search(self, last_name:str="", first_name:str="", max_distance:int=2, serie:str=None, year:str=None) -> list:
+        """Look for persons whose names are close to the ones given.
+
+        Names are compared regardless of accents, case and spaces. Each name
+        given must be within max_distance (Damerau-Levenshtein distance) of the
+        name of the person, or of one of its words. Candidates are ranked by the sum of the distances,
+        then by the Jaro-Winkler similarity of the whole name.
+
+        Keyword Arguments
+        ------------------
+        last_name : str, optional.
+            By default "".
+            Last name of the person (ignored if empty).
+
+        first_name : str, optional.
+            By default "".
+            First names of the person (ignored if empty).
+
+        max_distance : int, optional.
+            By default 2.
+            Maximum number of edits (insertion, deletion, substitution or
+            transposition of characters) for each name.
+
+        serie : str, optional.
+            By default None.
+            Serie of the person, all series are searched if None.
+
+        year : str, optional.
+            By default None.
+            Year of the dossier of the person, all years are searched if None.
+
+        Returns
+        -------
+        list:
+            Tuples (record, distance) ranked from the closest person.
+        """
+        import jellyfish
+        last_query,first_query = normalize_name(last_name),normalize_name(first_name)
+        if last_query:
+            scores = self._last.fuzzy_search(last_query,max_distance)
+            if first_query:
+                # First names are only compared for the persons with a close last name
+                scores = {record_id:distance+first for record_id,distance in scores.items()
+                          if (first := _FuzzyKeys.distance(first_query,normalize_name(split_name(self._records[record_id].name)[1]))) <= max_distance}
+        elif first_query:
+            scores = self._first.fuzzy_search(first_query,max_distance)
+        else:
+            scores = {}
+        if not scores:
+            return []
+        query = f"{last_query} {first_query}".strip()
+        ranked = []
+        for record_id,distance in scores.items():
+            record = self._records[record_id]
+            if ((serie is not None) and (record.serie != serie)) or ((year is not None) and (record.year != year)):
+                continue
+            last,first = split_name(record.name)
+            name = " ".join(normalize_name(part) for part,asked in ((last,last_query),(first,first_query)) if asked)
+            ranked.append((distance,-jellyfish.jaro_winkler_similarity(query,name),record_id))
+        return [(self._records[record_id],distance) for distance,_,record_id in sorted(ranked)]
+
+class NaturalizedStore:
+    """The sparse store of the naturalized persons, grouped by year, series and dossier."""
+    def __init__(self):
+        """Initialize an empty store
+
+        Only the dossiers where persons were found are kept, so memory, json
+        size and scans grow with the number of naturalized persons. Several
+        persons may share a dossier number, each with its own record. Dossiers
+        are grouped by the year of their prefix (e.g. 2021 for 2021X 027).
+
+        Example
+        -------
+        >>> naturalized = NaturalizedStore()
+        >>> naturalized.add(PersonRecord("027","123","VILLARREAL LARRAURI (Alejandro)","23/06/2021","013","Mexique"))
+        """
+        self._years = {}
+        # Number of persons of each year and serie
+        self._counts = {}
+        # Number of persons of each decree date
+        self._dates = {}
+        self._index = None
+
+    def add(self, record:PersonRecord):
+        """Add a person (replacing the record of the same name in the same dossier)."""
+        persons = self._years.setdefault(record.year,{}).setdefault(record.serie,{}).setdefault(record.dossier,{})
+        old = persons.get(record.name)
+        if old is None:
+            self._counts[(record.year,record.serie)] = self._counts.get((record.year,record.serie),0)+1
+        else:
+            self._dates[old.date] -= 1
+        self._dates[record.date] = self._dates.get(record.date,0)+1
+        persons[record.name] = record
+        if self._index is not None:
+            self._index.add(record)
+
+    def remove_decree(self, date:str, series:Iterable[str]=None) -> int:
+        """Remove the persons of a decree (e.g. before parsing it again).
+
+        The name index is built again on its next use if persons were removed.
+
+        Arguments
+        ----------
+        date : str, required.
+            Date of the decree.
+
+        Keyword Arguments
+        ------------------
+        series : Iterable[str], optional.
+            By default None.
+            Series whose persons are removed. If None, the persons of all the series are removed.
+
+        Returns
+        -------
+        int:
+            Number of persons removed.
+        """
+        if not self._dates.get(date):
+            return 0
+        series = None if series is None else set(series)
+        removed = 0
+        for year,dossiers_series in list(self._years.items()):
+            for serie,dossiers in list(dossiers_series.items()):
+                if (series is not None) and (serie not in series):
+                    continue
+                for dossier,persons in list(dossiers.items()):
+                    for name in [name for name,record in persons.items() if record.date == date]:
+                        del persons[name]
+                        self._counts[(year,serie)] -= 1
+                        removed += 1
+                    if not persons:
+                        del dossiers[dossier]
+                if not dossiers:
+                    del dossiers_series[serie]
+                    del self._counts[(year,serie)]
+            if not dossiers_series:
+                del self._years[year]
+        self._dates[date] -= removed
+        if not self._dates[date]:
+            del self._dates[date]
+        if removed:
+            self._index = None
+        return removed
+
+    def get(self, year:str, serie:str, dossier:str, name:str) -> PersonRecord:
+        """Get the record of a person by its key (None if not found)."""
+        return self._years.get(year,{}).get(serie,{}).get(dossier,{}).get(name)
+
+    def __contains__(self, key:tuple) -> bool:
+        """Whether a person (year, serie, dossier, name) is in the store."""
+        return self.get(*key) is not None
+
+    @property
+    def index(self) -> NameIndex:
+        """Name index of the persons, built on first use and kept up to date."""
+        if self._index is None:
+            self._index = NameIndex(self.records())
+        return self._index
+
+    def search(self, last_name:str="", first_name:str="", mode:str="substring", serie:str=None, year:str=None) -> list:
+        """Look for persons by name within the index (see NameIndex.search)."""
+        return self.index.search(last_name=last_name,first_name=first_name,mode=mode,serie=serie,year=year)
+
+    def fuzzy_search(self, last_name:str="", first_name:str="", max_distance:int=2, serie:str=None, year:str=None) -> list:
+        """Look for persons by close names within the index (see NameIndex.fuzzy_search)."""
+        return self.index.fuzzy_search(last_name=last_name,first_name=first_name,max_distance=max_distance,serie=serie,year=year)
+
+    def _dossiers(self, serie:str=None, year:str=None) -> Iterator[dict]:
+        """Iterate over the dossiers of a serie and year (all of them if None)."""
+        years = self._years.keys() if year is None else [year]
+        for yea in years:
+            series = self._years.get(yea,{})
+            for ser in (series.keys() if serie is None else [serie]):
+                yield from series.get(ser,{}).values()
+
+    def records(self, serie:str=None, year:str=None) -> Iterator[PersonRecord]:
+        """Iterate over the records of a serie and year, or of all the series or years if None."""
+        for dossier in self._dossiers(serie,year):
+            yield from dossier.values()
+
+    def dossier(self, serie:str, dossier:str, year:str=None) -> list:
+        """Get the records of a dossier (of all the years if None)."""
+        years = self._years.keys() if year is None else [year]
+        return [record for yea in years for record in self._years.get(yea,{}).get(serie,{}).get(dossier,{}).values()]
+
+    def series(self, year:str=None) -> list:
+        """Get the series with at least one person (in a year, or in any year if None)."""
+        years = self._years.keys() if year is None else [year]
+        return list(dict.fromkeys(ser for yea in years for ser in self._years.get(yea,{})))
+
+    def years(self) -> list:
+        """Get the years of the dossiers with at least one person."""
+        return list(self._years.keys())
+
+    def count(self, serie:str=None, year:str=None) -> int:
+        """Count the persons of a serie and year, or of all the series or years if None."""
+        if (serie is not None) and (year is not None):
+            return self._counts.get((year,serie),0)
+        return sum(count for (yea,ser),count in self._counts.items() if (serie in (None,ser)) and (year in (None,yea)))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[PersonRecord]:
+        return self.records()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other,NaturalizedStore) and self.to_json() == other.to_json()
+
+    def to_json(self) -> dict:
+        """Get the json dictionary of the store {year:{serie:{dossier:{name:{date,dep,country}}}}}."""
+        return {yea:{ser:{dos:{name:{"date":rec.date,"dep":rec.dep,"country":rec.country} for name,rec in persons.items()} for dos,persons in dossiers.items()} for ser,dossiers in series.items()} for yea,series in self._years.items()}
+
+    @classmethod
+    def from_json(cls, data:dict) -> "NaturalizedStore":
+        """Build the store from a naturalized json dictionary.
+
+        The format written by to_json is accepted, as well as the formats
+        without years (all the dossiers then being of DEFAULT_YEAR): the sparse
+        format, and the legacy format where every dossier slot of every serie
+        is present with the department and country shared by all the names of
+        the slot.
+
+        Arguments
+        ----------
+        data : dict, required.
+            Naturalized json dictionary.
+
+        Returns
+        -------
+        NaturalizedStore:
+            Store with all the persons found.
+
+
+        Example
+        -------
+        >>> naturalized = NaturalizedStore.from_json(json.load(f))
+        """
+        store = cls()
+        # Years are 4 digits long, series 3 digits long
+        if not all(len(key) == 4 for key in data):
+            data = {DEFAULT_YEAR:data}
+        for year,series in data.items():
+            for serie,dossiers in series.items():
+                for dossier,slot in dossiers.items():
+                    # Legacy slots keep department and country next to the names
+                    dep,country = slot.get("dep"),slot.get("country")
+                    for name,value in slot.items():
+                        if not isinstance(value,dict):
+                            continue
+                        store.add(PersonRecord(serie,dossier,name,value.get("date"),value.get("dep",dep),value.get("country",country),year=year))
+        return store
@@ -0,0 +1,314 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Local HTTP lookup server of the JORF reader.
+
+Keeps a Reader (its stores and name index) resident and answers lookups over
+HTTP/1.1 with keep-alive, so that each lookup does not pay the start of a new
+process and the load of the results. Only the standard library is used.
+
+Endpoints (json responses):
+
+- GET /person?last_name=...&first_name=...[&serie=027][&year=2020][&mode=substring][&fuzzy=1][&max_distance=2]
+- POST /people with a json body {"people": [[first_name, last_name], ...], ...}
+  and the same options as /person (batched lookups)
+- GET /dossier?number=2020X 027123[&name=...]: persons of a dossier
+- GET /series[?year=2020]: series with persons and their counts
+- GET /counts[?serie=027][&year=2020]: number of persons
+
+Responses are kept in a LRU cache, emptied as soon as new decrees are merged
+into the Reader (e.g. by Reader.watch running in the same event loop, or by
+other Readers saving to the same results folder, see Reader.refresh).
+
+Many server processes can answer the lookups of the same port (--reuse_port,
+where supported), sharing one copy of the persons if they look for them in a
+snapshot (--snapshot, see Reader.publish_snapshot).
+
+Example
+-------
+>>> python -m JORF_reader.server --JOs_path JOs --save_path results --port 8080 --watch
+>>> curl "http://127.0.0.1:8080/person?first_name=Alejandro&last_name=Villarreal"
+>>> python -m JORF_reader.server --save_path results --snapshot results/naturalized.snapshot --reuse_port
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+from .JORF_reader import Reader
+
+logger = logging.getLogger(__name__)
+
+# Status lines of the responses
+STATUS = {200:"OK",400:"Bad Request",404:"Not Found",405:"Method Not Allowed",413:"Payload Too Large"}
+# Largest body accepted (batched lookups)
+MAX_BODY = 1 << 22
+# Time (s) an idle connection is kept open
+KEEP_ALIVE = 15
+# Time (s) between two checks of the results saved by other Readers
+REFRESH = 1.0
+
+class HTTPError(Exception):
+    """Error answered to the client with its status."""
+    def __init__(self, status:int, message:str):
+        super().__init__(message)
+        self.status = status
+
+def record_json(record) -> dict:
+    """Get the information of a person record (see records.PersonRecord) as sent by the server."""
+    return {"name":record.name,"year":record.year,"serie":record.serie,"dossier":record.dossier,"date":record.date,
+            "dep":record.dep,"country":record.country}
+
+class LookupServer:
+    """The HTTP lookup server of a Reader."""
+    def __init__(self, reader:Reader, cache_size:int=1024, refresh:float=REFRESH):
+        """Initialize the lookup server
+
+        Arguments
+        ----------
+        reader : Reader, required.
+            Reader whose naturalized persons are looked for.
+
+        Keyword Arguments
+        ------------------
+        cache_size : int, optional.
+            By default 1024.
+            Number of responses kept in the LRU cache (no cache if 0).
+
+        refresh : float, optional.
+            By default REFRESH.
+            Time (s) between two checks of the results saved by other Readers
+            in the results folder (never checked if 0).
+
+        Example
+        -------
+        >>> server = LookupServer(Reader())
+        >>> asyncio.run(server.serve(port=8080))
+        """
+        self.reader = reader
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._updates = reader.updates
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key:tuple, answer) -> bytes:
+        """Get a response body from the cache, computed by answer() if not found."""
+        if self._updates != self.reader.updates:
+            # New decrees merged since the responses were cached
+            self._cache.clear()
+            self._updates = self.reader.updates
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+        self.misses += 1
+        body = json.dumps(answer(),ensure_ascii=False).encode("utf-8")
+        if self.cache_size:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+    def _lookup(self, first_name:str, last_name:str, options:dict) -> list:
+        """Get the persons found for a name with the options of a request."""
+        serie,year = options.get("serie") or None,options.get("year") or None
+        fuzzy = str(options.get("fuzzy","")).lower() in ("1","true","yes")
+        if fuzzy:
+            try:
+                max_distance = int(options.get("max_distance",2))
+            except ValueError:
+                raise HTTPError(400,"max_distance must be an integer")
+            found = self.reader.naturalized.fuzzy_search(last_name=last_name,first_name=first_name,max_distance=max_distance,serie=serie,year=year)
+            return [dict(record_json(record),distance=distance) for record,distance in found]
+        mode = options.get("mode","substring")
+        if mode not in ("exact","prefix","substring"):
+            raise HTTPError(400,"mode must be exact, prefix or substring")
+        return [record_json(record) for record in self.reader.naturalized.search(last_name=last_name,first_name=first_name,mode=mode,serie=serie,year=year)]
+
+    def handle(self, method:str, target:str, body:bytes=b"") -> tuple:
+        """Answer a request.
+
+        Arguments
+        ----------
+        method : str, required.
+            HTTP method of the request.
+
+        target : str, required.
+            Path and query of the request (e.g. "/counts?serie=027").
+
+        Keyword Arguments
+        ------------------
+        body : bytes, optional.
+            By default b"".
+            Body of the request (json of the batched lookups).
+
+        Returns
+        -------
+        tuple:
+            Status and json body of the response.
+        """
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        try:
+            if url.path == "/person":
+                if method != "GET":
+                    raise HTTPError(405,"use GET")
+                if not (query.get("last_name") or query.get("first_name")):
+                    raise HTTPError(400,"last_name or first_name is required")
+                key = (url.path,tuple(sorted(query.items())))
+                return 200,self._cached(key,lambda: self._person(query))
+            if url.path == "/people":
+                if method != "POST":
+                    raise HTTPError(405,"use POST")
+                try:
+                    request = json.loads(body or b"{}")
+                    people = [(str(first_name),str(last_name)) for first_name,last_name in request.get("people",[])]
+                except (ValueError,TypeError,AttributeError):
+                    raise HTTPError(400,"body must be {\"people\": [[first_name, last_name], ...]}")
+                options = {option:str(value) for option,value in request.items() if option != "people"}
+                key = (url.path,tuple(people),tuple(sorted(options.items())))
+                return 200,self._cached(key,lambda: {"found":[self._lookup(first_name,last_name,options) for first_name,last_name in people]})
+            if url.path == "/dossier":
+                if not query.get("number"):
+                    raise HTTPError(400,"number is required")
+                key = (url.path,query["number"],query.get("name",""))
+                return 200,self._cached(key,lambda: self._dossier(query))
+            if url.path == "/series":
+                key = (url.path,query.get("year"))
+                return 200,self._cached(key,lambda: {"year":query.get("year"),"series":{serie:self.reader.naturalized.count(serie,year=query.get("year"))
+                                                                                          for serie in self.reader.naturalized.series(year=query.get("year"))}})
+            if url.path == "/counts":
+                key = (url.path,query.get("serie"),query.get("year"))
+                return 200,self._cached(key,lambda: {"serie":query.get("serie"),"year":query.get("year"),
+                                                    "count":self.reader.naturalized.count(query.get("serie"),year=query.get("year"))})
+            raise HTTPError(404,f"unknown path {url.path}")
+        except HTTPError as error:
+            return error.status,json.dumps({"error":str(error)}).encode("utf-8")
+
+    def _dossier(self, query:dict) -> dict:
+        try:
+            found = [record_json(record) for record in self.reader.search_dossier(query["number"],name=query.get("name",""))]
+        except ValueError as error:
+            raise HTTPError(400,str(error))
+        return {"found":bool(found),"persons":found}
+
+    def _person(self, query:dict) -> dict:
+        found = self._lookup(query.get("first_name",""),query.get("last_name",""),query)
+        return {"found":bool(found),"persons":found}
+
+    async def _refreshing(self):
+        """Load the results saved by other Readers every refresh seconds, within a thread (lookups are answered meanwhile)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.refresh)
+            try:
+                await loop.run_in_executor(None,self.reader.refresh)
+            except Exception:
+                logger.exception("The results could not be loaded again")
+
+    async def _connection(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        """Answer the requests of a connection until it is closed (keep-alive)."""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(),KEEP_ALIVE)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                try:
+                    method,target,version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n",b"\n",b""):
+                        break
+                    name,_,value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length",0) or 0)
+                if length > MAX_BODY:
+                    status,body = 413,json.dumps({"error":"body too large"}).encode("utf-8")
+                    keep_alive = False
+                else:
+                    status,body = self.handle(method.upper(),target,await reader.readexactly(length) if length else b"")
+                    connection = headers.get("connection","").lower()
+                    keep_alive = (connection == "keep-alive") if version == "HTTP/1.0" else (connection != "close")
+                writer.write((f"HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")+body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError,asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host:str="127.0.0.1", port:int=8080, watch:bool=False, reuse_port:bool=False, **kwargs):
+        """Serve the lookups until cancelled.
+
+        Keyword Arguments
+        ------------------
+        host : str, optional.
+            By default "127.0.0.1".
+            Address the server listens to.
+
+        port : int, optional.
+            By default 8080.
+            Port the server listens to.
+
+        watch : bool, optional.
+            By default False.
+            Also watches the JOs folder of the Reader, in the same event loop,
+            to ingest the new JOs (see Reader.watch, kwargs are passed to it).
+
+        reuse_port : bool, optional.
+            By default False.
+            Lets other processes listen to the same port (SO_REUSEPORT, not
+            available on Windows), the connections being shared between them.
+        """
+        server = await asyncio.start_server(self._connection,host,port,reuse_port=reuse_port or None)
+        logger.info("Serving the lookups on http://%s:%s",host,port)
+        tasks = [server.serve_forever()]
+        if watch:
+            tasks.append(self.reader.watch(**kwargs))
+        if self.refresh:
+            tasks.append(self._refreshing())
+        async with server:
+            await asyncio.gather(*tasks)
+
+def main(argv:list=None):
+    parser = argparse.ArgumentParser(description="Local HTTP lookup server of the naturalized persons found by the JORF reader.")
+    parser.add_argument("--JOs_path",default="JOs",help="folder of the JOs pdf files")
+    parser.add_argument("--save_path",default=os.path.join(os.getcwd(),"results"),help="folder of the results")
+    parser.add_argument("--storage",default="json",help="storage of the results, json or sqlite")
+    parser.add_argument("--host",default="127.0.0.1",help="address the server listens to")
+    parser.add_argument("--port",type=int,default=8080,help="port the server listens to")
+    parser.add_argument("--cache_size",type=int,default=1024,help="number of responses cached")
+    parser.add_argument("--snapshot",default=None,help="snapshot the persons are looked for in (see Reader.publish_snapshot)")
+    parser.add_argument("--reuse_port",action="store_true",help="let other server processes listen to the same port")
+    parser.add_argument("--refresh",type=float,default=REFRESH,help="time between two checks of the results saved by other processes")
+    parser.add_argument("--watch",action="store_true",help="ingest the new JOs of the folder as they land")
+    parser.add_argument("--interval",type=float,default=2.0,help="time between two polls of the folder")
+    parser.add_argument("--workers",type=int,default=1,help="number of JOs read at the same time")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO,format="%(message)s")
+    reader = Reader(JOs_path=args.JOs_path,save_path=args.save_path,storage=args.storage,workers=args.workers,snapshot=args.snapshot)
+    # Stores and name index are loaded before the first request
+    reader.naturalized.index
+    server = LookupServer(reader,cache_size=args.cache_size,refresh=args.refresh)
+    watch = {"interval":args.interval,"workers":args.workers} if args.watch else {}
+    try:
+        asyncio.run(server.serve(host=args.host,port=args.port,watch=args.watch,reuse_port=args.reuse_port,**watch))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
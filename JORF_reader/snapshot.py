@@ -0,0 +1,422 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Read-only snapshot of the naturalized persons, shared by lookup processes.
+
+A snapshot file holds the records of the persons and their name index (the
+same index as records.NameIndex) as sorted string tables and arrays of
+offsets, read in place from a memory map: opening a snapshot only reads its
+header, and all the processes opening the same snapshot share the pages of the
+file instead of each one loading its own copy of the persons.
+
+Layout of the file: magic bytes, size of the json header, json header (number
+of records, series of each year with their records, and offset and size of
+each section), then the sections, each one aligned on 8 bytes:
+
+- values: string table (utf-8 strings and their offsets) of all the fields of
+  the records.
+- records: 7 string ids per record (year, serie, dossier, name, date, dep and
+  country, -1 if None), records being in the order of the store.
+- order: record ids sorted by year, serie, dossier and name.
+- last.keys, first.keys: sorted normalized names, with the ids of their records
+  (postings and values arrays) and the hash table (crc32) of the names.
+- last.grams, first.grams: trigrams of the names, with their names.
+- last.entries, last.codes, last.entry_grams (and first.*): blocking of the
+  fuzzy search (see records._FuzzyKeys).
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Iterator
+from .records import PersonRecord, NameIndex, _KeyIndex, _FuzzyKeys, normalize_name, split_name
+from .locking import atomic_write
+
+# Magic bytes of the snapshot files
+MAGIC = b"JORFSNP1"
+# Fields of a record, as stored
+FIELDS = ["year","serie","dossier","name","date","dep","country"]
+
+def _add_table(sections:dict, name:str, strings:list):
+    """Add the sections of a string table."""
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("I",[0])
+    for data in encoded:
+        offsets.append(offsets[-1]+len(data))
+    sections[f"{name}.strings"] = b"".join(encoded)
+    sections[f"{name}.offsets"] = offsets.tobytes()
+
+def _add_map(sections:dict, name:str, mapping:dict) -> dict:
+    """Add the sections of a map of strings to integers, giving the position of each string."""
+    keys = sorted(mapping)
+    _add_table(sections,name,keys)
+    postings,values = array("I",[0]),array("i")
+    for key in keys:
+        values.extend(sorted(mapping[key]))
+        postings.append(len(values))
+    sections[f"{name}.postings"] = postings.tobytes()
+    sections[f"{name}.values"] = values.tobytes()
+    # Hash table of the positions of the strings (open addressing, half empty)
+    slots = 1 << max(2*len(keys)-1,1).bit_length()
+    table = array("i",[-1])*slots
+    for position,key in enumerate(keys):
+        slot = zlib.crc32(key.encode("utf-8")) & (slots-1)
+        while table[slot] >= 0:
+            slot = (slot+1) & (slots-1)
+        table[slot] = position
+    sections[f"{name}.hash"] = table.tobytes()
+    return {key:position for position,key in enumerate(keys)}
+
+class _StringTable:
+    """Strings of a snapshot, decoded when asked for (sorted if the table of a map)."""
+    def __init__(self, snapshot:"NaturalizedSnapshot", name:str):
+        self._strings = snapshot._section(f"{name}.strings")
+        self._offsets = snapshot._section(f"{name}.offsets","I")
+
+    def __len__(self) -> int:
+        return len(self._offsets)-1
+
+    def __getitem__(self, position:int) -> str:
+        return str(self._strings[self._offsets[position]:self._offsets[position+1]],"utf-8")
+
+class _MappedMap:
+    """Sorted strings of a snapshot to integers, read by string (.get) or by position ([])."""
+    def __init__(self, snapshot:"NaturalizedSnapshot", name:str, container:type=list):
+        self.keys = _StringTable(snapshot,name)
+        self._postings = snapshot._section(f"{name}.postings","I")
+        self._values = snapshot._section(f"{name}.values","i")
+        self._hash = snapshot._section(f"{name}.hash","i")
+        self._container = container
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.keys)))
+
+    def __getitem__(self, position:int):
+        return self._container(self._values[self._postings[position]:self._postings[position+1]])
+
+    def size(self, position:int) -> int:
+        """Get the number of integers of a string by its position."""
+        return self._postings[position+1]-self._postings[position]
+
+    def find(self, key:str) -> int:
+        """Get the position of a string (-1 if not found)."""
+        mask = len(self._hash)-1
+        slot = zlib.crc32(key.encode("utf-8")) & mask
+        while True:
+            position = self._hash[slot]
+            if (position < 0) or (self.keys[position] == key):
+                return position
+            slot = (slot+1) & mask
+
+    def get(self, key:str, default=None):
+        position = self.find(key)
+        return default if position < 0 else self[position]
+
+class _MappedFuzzyKeys(_FuzzyKeys):
+    """Fuzzy blocking of the names of a snapshot (candidates being positions of entries)."""
+    def __init__(self, snapshot:"NaturalizedSnapshot", name:str):
+        self._keys = _MappedMap(snapshot,f"{name}.entries")
+        self._codes = _MappedMap(snapshot,f"{name}.codes",container=set)
+        self._grams = _MappedMap(snapshot,f"{name}.entry_grams")
+
+    def _entry(self, candidate:int) -> str:
+        return self._keys.keys[candidate]
+
+    def add(self, key:str):
+        raise TypeError("A snapshot is read-only")
+
+class _MappedKeyIndex(_KeyIndex):
+    """Index of the names of a snapshot (names being positions in the sorted names)."""
+    def __init__(self, snapshot:"NaturalizedSnapshot", name:str):
+        self._ids = _MappedMap(snapshot,f"{name}.keys")
+        self._keys = self._ids.keys
+        self._sorted = True
+        self._grams = _MappedMap(snapshot,f"{name}.grams")
+        self._fuzzy = _MappedFuzzyKeys(snapshot,name)
+
+    def add(self, key:str, record_id:int):
+        raise TypeError("A snapshot is read-only")
+
+    def search(self, query:str, mode:str) -> set:
+        if mode == "exact":
+            return set(self._ids.get(query,()))
+        if mode == "prefix":
+            positions = []
+            for position in range(bisect_left(self._keys,query),len(self._keys)):
+                if not self._keys[position].startswith(query):
+                    break
+                positions.append(position)
+        else:
+            grams = [self._grams.find(gram) for gram in self._trigrams(query)]
+            if grams:
+                if min(grams) < 0:
+                    return set()
+                # Names of the least frequent trigram of the query are candidates
+                candidates = self._grams[min(grams,key=self._grams.size)]
+            else:
+                candidates = range(len(self._keys))
+            positions = [position for position in candidates if query in self._keys[position]]
+        return {record_id for position in positions for record_id in self._ids[position]}
+
+class _MappedRecords:
+    """Records of a snapshot by id, decoded when asked for."""
+    def __init__(self, snapshot:"NaturalizedSnapshot"):
+        self._values = _StringTable(snapshot,"values")
+        self._fields = snapshot._section("records","i")
+
+    def __len__(self) -> int:
+        return len(self._fields)//len(FIELDS)
+
+    def __getitem__(self, record_id:int) -> PersonRecord:
+        start = record_id*len(FIELDS)
+        year,serie,dossier,name,date,dep,country = (None if value < 0 else self._values[value] for value in self._fields[start:start+len(FIELDS)])
+        return PersonRecord(serie,dossier,name,date,dep,country,year=year)
+
+    def key(self, record_id:int) -> tuple:
+        """Get the key (year, serie, dossier, name) of a record."""
+        start = record_id*len(FIELDS)
+        return tuple(self._values[value] for value in self._fields[start:start+4])
+
+class _SortedKeys:
+    """Keys of the records of a snapshot, sorted."""
+    def __init__(self, records:_MappedRecords, order:memoryview):
+        self._records = records
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, position:int) -> tuple:
+        return self._records.key(self.order[position])
+
+class _MappedNameIndex(NameIndex):
+    """Name index of a snapshot (see NameIndex)."""
+    def __init__(self, snapshot:"NaturalizedSnapshot"):
+        self._records = snapshot._records
+        self._positions = None
+        self._last = _MappedKeyIndex(snapshot,"last")
+        self._first = _MappedKeyIndex(snapshot,"first")
+
+    def add(self, record:PersonRecord):
+        raise TypeError("A snapshot is read-only")
+
+class NaturalizedSnapshot:
+    """The read-only snapshot of the naturalized persons, read from a memory map."""
+    def __init__(self, file_snapshot:str):
+        """Open a snapshot file
+
+        Only the header is read, the records and the name index being read
+        from the memory map of the file when looked for. The lookups of
+        records.NaturalizedStore are available (search, fuzzy_search, get,
+        dossier, records, series, years and count), with the same results.
+        Snapshots are written by the .publish method.
+
+        Arguments
+        ----------
+        file_snapshot : str, required.
+            File path of the snapshot.
+
+        Example
+        -------
+        >>> naturalized = NaturalizedSnapshot(r"results\\naturalized.snapshot")
+        >>> naturalized.search(last_name="villarreal",first_name="alejandro",mode="prefix")
+        [PersonRecord('027', '123', 'VILLARREAL LARRAURI (Alejandro)', '23/06/2021', '013', 'Mexique')]
+        """
+        self.file_snapshot = file_snapshot
+        with open(file_snapshot,"rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._views = [self._view]
+        if self._view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{file_snapshot} is not a snapshot file")
+        size = int.from_bytes(self._view[len(MAGIC):len(MAGIC)+8],"little")
+        header = json.loads(str(self._view[len(MAGIC)+8:len(MAGIC)+8+size],"utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{file_snapshot} was written on a {header['byteorder']} endian system")
+        self._start = _aligned(len(MAGIC)+8+size)
+        self._sections = header["sections"]
+        # Records of each year and serie, in the order of the store
+        self._groups = header["groups"]
+        self._records = _MappedRecords(self)
+        self._sorted = _SortedKeys(self._records,self._section("order","i"))
+        self._index = None
+
+    def _section(self, name:str, typecode:str=None) -> memoryview:
+        """Get a section of the file (as an array of typecode if given)."""
+        offset,size = self._sections[name]
+        view = self._view[self._start+offset:self._start+offset+size]
+        if typecode is not None:
+            view = view.cast(typecode)
+        self._views.append(view)
+        return view
+
+    def changed(self) -> bool:
+        """Whether the snapshot file was replaced (e.g. published again) since it was opened."""
+        try:
+            stat = os.stat(self.file_snapshot)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino,stat.st_size,stat.st_mtime_ns) != (self._stat.st_ino,self._stat.st_size,self._stat.st_mtime_ns)
+
+    def close(self):
+        """Close the memory map of the file (records already found remain valid)."""
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+
+    @property
+    def index(self) -> NameIndex:
+        """Name index of the persons (read from the file, nothing is built)."""
+        if self._index is None:
+            self._index = _MappedNameIndex(self)
+        return self._index
+
+    def search(self, last_name:str="", first_name:str="", mode:str="substring", serie:str=None, year:str=None) -> list:
+        """Look for persons by name within the index (see NameIndex.search)."""
+        return self.index.search(last_name=last_name,first_name=first_name,mode=mode,serie=serie,year=year)
+
+    def fuzzy_search(self, last_name:str="", first_name:str="", max_distance:int=2, serie:str=None, year:str=None) -> list:
+        """Look for persons by close names within the index (see NameIndex.fuzzy_search)."""
+        return self.index.fuzzy_search(last_name=last_name,first_name=first_name,max_distance=max_distance,serie=serie,year=year)
+
+    def get(self, year:str, serie:str, dossier:str, name:str) -> PersonRecord:
+        """Get the record of a person by its key (None if not found)."""
+        key = (year,serie,dossier,name)
+        position = bisect_left(self._sorted,key)
+        if (position < len(self._sorted)) and (self._sorted[position] == key):
+            return self._records[self._sorted.order[position]]
+        return None
+
+    def __contains__(self, key:tuple) -> bool:
+        """Whether a person (year, serie, dossier, name) is in the snapshot."""
+        return self.get(*key) is not None
+
+    def dossier(self, serie:str, dossier:str, year:str=None) -> list:
+        """Get the records of a dossier (of all the years if None)."""
+        found = []
+        for yea in (self.years() if year is None else [year]):
+            record_ids = []
+            for position in range(bisect_left(self._sorted,(yea,serie,dossier)),len(self._sorted)):
+                if self._sorted[position][:3] != (yea,serie,dossier):
+                    break
+                record_ids.append(self._sorted.order[position])
+            found += [self._records[record_id] for record_id in sorted(record_ids)]
+        return found
+
+    def records(self, serie:str=None, year:str=None) -> Iterator[PersonRecord]:
+        """Iterate over the records of a serie and year, or of all the series or years if None."""
+        for yea,ser,start,end in self._groups:
+            if (serie in (None,ser)) and (year in (None,yea)):
+                for record_id in range(start,end):
+                    yield self._records[record_id]
+
+    def series(self, year:str=None) -> list:
+        """Get the series with at least one person (in a year, or in any year if None)."""
+        return list(dict.fromkeys(ser for yea,ser,_,_ in self._groups if year in (None,yea)))
+
+    def years(self) -> list:
+        """Get the years of the dossiers with at least one person."""
+        return list(dict.fromkeys(yea for yea,_,_,_ in self._groups))
+
+    def count(self, serie:str=None, year:str=None) -> int:
+        """Count the persons of a serie and year, or of all the series or years if None."""
+        return sum(end-start for yea,ser,start,end in self._groups if (serie in (None,ser)) and (year in (None,yea)))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[PersonRecord]:
+        return self.records()
+
+    def to_json(self) -> dict:
+        """Get the json dictionary of the persons (see NaturalizedStore.to_json)."""
+        data = {}
+        for rec in self.records():
+            data.setdefault(rec.year,{}).setdefault(rec.serie,{}).setdefault(rec.dossier,{})[rec.name] = {"date":rec.date,"dep":rec.dep,"country":rec.country}
+        return data
+
+    @staticmethod
+    def publish(records:Iterator[PersonRecord], file_snapshot:str) -> int:
+        """Write the snapshot of the persons (and of their name index).
+
+        The snapshot is written to a temporary file renamed over the old one,
+        so that the processes reading the old snapshot keep reading it until
+        they open the new one (see .changed method). On Windows, the old
+        snapshot can only be replaced once closed by all the processes.
+
+        Arguments
+        ----------
+        records : Iterator[PersonRecord], required.
+            Records of the persons (e.g. a records.NaturalizedStore).
+
+        file_snapshot : str, required.
+            File path of the snapshot.
+
+        Returns
+        -------
+        int:
+            Number of persons written.
+        """
+        records = list(records)
+        values = {}
+        def value_id(value:str) -> int:
+            if value is None:
+                return -1
+            if value not in values:
+                values[value] = len(values)
+            return values[value]
+        fields = array("i",(value_id(getattr(record,field)) for record in records for field in FIELDS))
+        order = array("i",sorted(range(len(records)),key=lambda record_id: (records[record_id].year,records[record_id].serie,
+                                                                            records[record_id].dossier,records[record_id].name)))
+        groups = []
+        for record_id,record in enumerate(records):
+            if groups and (groups[-1][:2] == [record.year,record.serie]):
+                groups[-1][3] = record_id+1
+            else:
+                groups.append([record.year,record.serie,record_id,record_id+1])
+        sections = {}
+        _add_table(sections,"values",list(values))
+        sections["records"] = fields.tobytes()
+        sections["order"] = order.tobytes()
+        for part,name in ((0,"last"),(1,"first")):
+            ids = {}
+            for record_id,record in enumerate(records):
+                ids.setdefault(normalize_name(split_name(record.name)[part]),[]).append(record_id)
+            positions = _add_map(sections,f"{name}.keys",ids)
+            grams = {}
+            for key,position in positions.items():
+                for gram in _KeyIndex._trigrams(key):
+                    grams.setdefault(gram,[]).append(position)
+            _add_map(sections,f"{name}.grams",grams)
+            fuzzy = _FuzzyKeys()
+            for key in positions:
+                fuzzy.add(key)
+            entries = _add_map(sections,f"{name}.entries",{entry:[positions[key] for key in keys] for entry,keys in fuzzy._keys.items()})
+            _add_map(sections,f"{name}.codes",{code:[entries[entry] for entry in found] for code,found in fuzzy._codes.items()})
+            _add_map(sections,f"{name}.entry_grams",{gram:[entries[entry] for entry in found] for gram,found in fuzzy._grams.items()})
+        offsets,offset = {},0
+        for name,data in sections.items():
+            offsets[name] = [offset,len(data)]
+            offset = _aligned(offset+len(data))
+        header = json.dumps({"records":len(records),"byteorder":sys.byteorder,"groups":groups,"sections":offsets},ensure_ascii=False).encode("utf-8")
+        with atomic_write(file_snapshot,"wb") as f:
+            f.write(MAGIC+len(header).to_bytes(8,"little")+header)
+            f.write(bytes(_aligned(len(MAGIC)+8+len(header))-len(MAGIC)-8-len(header)))
+            for name,data in sections.items():
+                f.write(data)
+                f.write(bytes(_aligned(len(data))-len(data)))
+        return len(records)
+
+def _aligned(offset:int) -> int:
+    """Offset rounded up to a multiple of 8 bytes."""
+    return (offset+7)//8*8
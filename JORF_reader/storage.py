@@ -0,0 +1,368 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import codecs
+import sqlite3
+from collections.abc import MutableMapping
+from .textcache import TextCache
+from .records import DEFAULT_YEAR
+from .metrics import metrics
+from .locking import atomic_write
+
+class JSONStorage:
+    """The storage of the results in json files (default storage)."""
+    def __init__(self, file_decrees:str, file_decrees_string:str, file_nat:str, compression:str="zlib"):
+        """Initialize the json storage
+
+        The results are kept in the decrees and naturalized json files, which
+        are written as a whole each time they are saved (to a temporary file
+        renamed over the old one, so readers never see a half-written file).
+        The decree strings are kept in a compressed cache (see
+        JORF_reader.textcache module), in the folder named as the decrees string
+        json file without extension. A decrees string json file found without
+        cache is imported into the cache, and the export method still writes it.
+
+        Arguments
+        ----------
+        file_decrees : str, required.
+            File path of the decrees json file.
+
+        file_decrees_string : str, required.
+            File path of the decrees string json file.
+
+        file_nat : str, required.
+            File path of the naturalized json file.
+
+        Keyword Arguments
+        ------------------
+        compression : str, optional.
+            By default "zlib".
+            Compression of the decree strings cache, "zlib" or "lzma".
+
+        Example
+        -------
+        >>> storage = JSONStorage(r"results\\decrees.json",r"results\\decrees_string.json",r"results\\naturalized.json")
+        """
+        self._file_decrees = file_decrees
+        self._file_decrees_string = file_decrees_string
+        self._file_nat = file_nat
+        self._cache_path = os.path.splitext(file_decrees_string)[0]
+        self._compression = compression
+
+    @staticmethod
+    def _load(file_path:str) -> dict:
+        """Load a json file, None if not found."""
+        if not os.path.isfile(file_path):
+            return None
+        with codecs.open(file_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _dump(obj:dict, file_path:str):
+        """Write a whole json file (renamed over the old one once written, see locking.atomic_write)."""
+        with atomic_write(file_path) as f:
+            json.dump(obj, f, ensure_ascii=False)
+
+    def load(self) -> tuple:
+        """Load the decrees, naturalized and decrees string dictionaries.
+
+        Returns
+        -------
+        tuple:
+            Decrees and naturalized dictionaries (None if not found), and
+            decree strings cache.
+        """
+        mega_string = TextCache(self._cache_path,compression=self._compression)
+        if len(mega_string) == 0:
+            legacy = self._load(self._file_decrees_string)
+            if legacy:
+                mega_string.update(legacy)
+                mega_string.save()
+        return self._load(self._file_decrees),self._load(self._file_nat),mega_string
+
+    def write_decree_string(self, reader, date:str, **kwargs):
+        """Save the decree string of a decree (to the decree strings cache).
+
+        Extra arg/kwarg
+        ---------------
+        file_decrees_string : str
+            Save file path for decrees string json. If given, the whole decrees
+            string json file is written instead.
+        """
+        if "file_decrees_string" in kwargs:
+            self._dump(dict(reader.mega_string),kwargs["file_decrees_string"])
+        else:
+            reader.mega_string.save()
+
+    def write_decree(self, reader, date:str, pdf_path:str, series:list, persons:list, **kwargs):
+        """Save the persons of a decree (whole decrees and naturalized json files).
+
+        Extra arg/kwarg
+        ---------------
+        file_decrees : str
+            Save file path for decrees json.
+
+        file_nat : str
+            Save file path for naturalization json.
+        """
+        self._dump(reader.decrees,kwargs.get("file_decrees",self._file_decrees))
+        self._dump(reader.naturalized.to_json(),kwargs.get("file_nat",self._file_nat))
+
+    def write_decrees(self, reader, decrees:list):
+        """Save the decree strings and persons of several decrees (each json file written once for all of them).
+
+        Arguments
+        ----------
+        reader : Reader, required.
+            Reader the decrees were merged into.
+
+        decrees : list, required.
+            Tuples (date, pdf path, series, persons) of the decrees merged.
+        """
+        reader.mega_string.save()
+        self._dump(reader.decrees,self._file_decrees)
+        self._dump(reader.naturalized.to_json(),self._file_nat)
+
+    def write_all(self, reader):
+        """Replace the decrees and naturalized json files as a whole (e.g. after a reindex)."""
+        self._dump(reader.decrees,self._file_decrees)
+        self._dump(reader.naturalized.to_json(),self._file_nat)
+
+    def export(self, reader, **kwargs):
+        """Write all the json files.
+
+        Extra arg/kwarg
+        ---------------
+        file_decrees : str
+            Save file path for decrees json.
+
+        file_decrees_string : str
+            Save file path for decrees string json.
+
+        file_nat : str
+            Save file path for naturalization json.
+        """
+        self._dump(reader.decrees,kwargs.get("file_decrees",self._file_decrees))
+        self._dump(dict(reader.mega_string),kwargs.get("file_decrees_string",self._file_decrees_string))
+        self._dump(reader.naturalized.to_json(),kwargs.get("file_nat",self._file_nat))
+
+# Time (s) a SQLite connection waits for the database locked by another writer
+BUSY_TIMEOUT = 60
+
+class SQLiteStrings(MutableMapping):
+    """The decree strings of a SQLite database, read when asked for."""
+    def __init__(self, connection:sqlite3.Connection):
+        self._connection = connection
+        self._pending = {}
+
+    def __getitem__(self, date:str) -> str:
+        if date in self._pending:
+            return self._pending[date]
+        row = self._connection.execute("SELECT string FROM decree_strings WHERE date = ?",(date,)).fetchone()
+        if row is None:
+            raise KeyError(date)
+        return row[0]
+
+    def __setitem__(self, date:str, decree_string:str):
+        self._pending[date] = decree_string
+
+    def __delitem__(self, date:str):
+        if date not in self:
+            raise KeyError(date)
+        self._pending.pop(date,None)
+        with self._connection:
+            self._connection.execute("DELETE FROM decree_strings WHERE date = ?",(date,))
+
+    def __contains__(self, date:str) -> bool:
+        return (date in self._pending) or (self._connection.execute("SELECT 1 FROM decree_strings WHERE date = ?",(date,)).fetchone() is not None)
+
+    def __iter__(self):
+        dates = [date for date, in self._connection.execute("SELECT date FROM decree_strings ORDER BY rowid")]
+        yield from dates
+        known = set(dates)
+        yield from [date for date in self._pending if date not in known]
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def save(self):
+        """Write the new decree strings to the database."""
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO decree_strings VALUES (?, ?)",self._pending.items())
+        metrics.count("rows_written",len(self._pending))
+        self._pending.clear()
+
+class SQLiteStorage:
+    """The storage of the results in a SQLite database."""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS decrees (
+            serie TEXT NOT NULL, date TEXT NOT NULL, path TEXT,
+            PRIMARY KEY (serie, date));
+        CREATE TABLE IF NOT EXISTS decree_strings (
+            date TEXT PRIMARY KEY, string TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS naturalized (
+            year TEXT NOT NULL, serie TEXT NOT NULL, dossier TEXT NOT NULL, name TEXT NOT NULL,
+            date TEXT, dep TEXT, country TEXT,
+            UNIQUE (year, serie, dossier, name));
+        CREATE INDEX IF NOT EXISTS naturalized_date ON naturalized (date);
+    """
+    # Databases written before the year of the dossiers was parsed
+    MIGRATE_YEAR = """
+        ALTER TABLE naturalized RENAME TO naturalized_without_year;
+        CREATE TABLE naturalized (
+            year TEXT NOT NULL, serie TEXT NOT NULL, dossier TEXT NOT NULL, name TEXT NOT NULL,
+            date TEXT, dep TEXT, country TEXT,
+            UNIQUE (year, serie, dossier, name));
+        INSERT INTO naturalized SELECT '{year}', serie, dossier, name, date, dep, country FROM naturalized_without_year ORDER BY rowid;
+        DROP TABLE naturalized_without_year;
+        CREATE INDEX IF NOT EXISTS naturalized_date ON naturalized (date);
+    """
+    def __init__(self, file_db:str):
+        """Initialize the SQLite storage
+
+        Only what a decree adds (its decree string, and the persons and series
+        it fills) is written, within a transaction, so that the results are
+        never left half-written. The json files remain available with the
+        export method. The database is opened in write-ahead log mode, so that
+        several Readers can share it.
+
+        Arguments
+        ----------
+        file_db : str, required.
+            File path of the SQLite database.
+
+        Example
+        -------
+        >>> storage = SQLiteStorage(r"results\\naturalized.db")
+        """
+        self._file_db = file_db
+        # Readers of the database are not blocked by a writer (write-ahead
+        # log), and writers wait for each other. The results may be loaded
+        # again from another thread (see Reader.refresh)
+        self._connection = sqlite3.connect(file_db,timeout=BUSY_TIMEOUT,check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.executescript(self.SCHEMA)
+        columns = [column[1] for column in self._connection.execute("PRAGMA table_info(naturalized)")]
+        if "year" not in columns:
+            self._connection.executescript("BEGIN;"+self.MIGRATE_YEAR.format(year=DEFAULT_YEAR)+"COMMIT;")
+        self._strings = SQLiteStrings(self._connection)
+
+    def load(self) -> tuple:
+        """Load the decrees, naturalized and decrees string dictionaries.
+
+        Returns
+        -------
+        tuple:
+            Decrees and naturalized dictionaries (None if the database is
+            empty), and decree strings (read from the database when asked for).
+        """
+        if self._connection.execute("SELECT COUNT(*) FROM decrees").fetchone()[0] == 0:
+            return None,None,self._strings
+        decrees = {}
+        for serie,date,path in self._connection.execute("SELECT serie, date, path FROM decrees ORDER BY rowid"):
+            decrees.setdefault(serie,{})[date] = path
+        naturalized = {}
+        for year,serie,dossier,name,date,dep,country in self._connection.execute("SELECT year, serie, dossier, name, date, dep, country FROM naturalized ORDER BY rowid"):
+            naturalized.setdefault(year,{}).setdefault(serie,{}).setdefault(dossier,{})[name] = {"date":date,"dep":dep,"country":country}
+        return decrees,naturalized,self._strings
+
+    def import_results(self, decrees:dict, naturalized, mega_string:dict):
+        """Import the dictionaries of the json files into the database.
+
+        Arguments
+        ----------
+        decrees : dict, required.
+            Decrees dictionary.
+
+        naturalized : NaturalizedStore, required.
+            Store of the naturalized persons.
+
+        mega_string : Mapping, required.
+            Decree strings by date.
+        """
+        rows = [(rec.year,rec.serie,rec.dossier,rec.name,rec.date,rec.dep,rec.country) for rec in naturalized]
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO decrees VALUES (?, ?, ?)",[(serie,date,path) for serie,dates in decrees.items() for date,path in dates.items()])
+            self._connection.executemany("INSERT OR REPLACE INTO decree_strings VALUES (?, ?)",mega_string.items())
+            self._connection.executemany("INSERT OR REPLACE INTO naturalized VALUES (?, ?, ?, ?, ?, ?, ?)",rows)
+
+    def write_decree_string(self, reader, date:str, **kwargs):
+        """Save the decree string of a decree."""
+        if reader.mega_string is self._strings:
+            self._strings.save()
+        else:
+            with self._connection:
+                self._connection.execute("INSERT OR REPLACE INTO decree_strings VALUES (?, ?)",(date,reader.mega_string[date]))
+            metrics.count("rows_written")
+
+    def write_decree(self, reader, date:str, pdf_path:str, series:list, persons:list, **kwargs):
+        """Save the persons of a decree for the series given (replacing the ones saved before for these series).
+
+        Arguments
+        ----------
+        reader : Reader, required.
+            Reader the decree was merged into.
+
+        date : str, required.
+            Date of the decree.
+
+        pdf_path : str, required.
+            PDF path of the decree.
+
+        series : list, required.
+            Series filled with the decree.
+
+        persons : list, required.
+            Tuples (year, serie, dossier, name, department, country) parsed from the decree.
+        """
+        with self._connection:
+            rows_written = self._write_decree(date,pdf_path,series,persons)
+        metrics.count("rows_written",rows_written)
+
+    def write_decrees(self, reader, decrees:list):
+        """Save the decree strings and persons of several decrees, the persons within one transaction (see .write_decree).
+
+        Arguments
+        ----------
+        reader : Reader, required.
+            Reader the decrees were merged into.
+
+        decrees : list, required.
+            Tuples (date, pdf path, series, persons) of the decrees merged.
+        """
+        if reader.mega_string is self._strings:
+            self._strings.save()
+            strings = []
+        else:
+            strings = [(date,reader.mega_string[date]) for date,_,_,_ in decrees]
+        rows_written = len(strings)
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO decree_strings VALUES (?, ?)",strings)
+            for date,pdf_path,series,persons in decrees:
+                rows_written += self._write_decree(date,pdf_path,series,persons)
+        metrics.count("rows_written",rows_written)
+
+    def _write_decree(self, date:str, pdf_path:str, series:list, persons:list) -> int:
+        """Replace the persons of a decree for the series given, within the transaction opened (number of rows written)."""
+        series = set(series)
+        rows = [(year,serie,dossier,name,date,dep,country) for year,serie,dossier,name,dep,country in persons if serie in series]
+        self._connection.execute(f"DELETE FROM naturalized WHERE date = ? AND serie IN ({', '.join('?'*len(series))})",(date,*sorted(series)))
+        self._connection.executemany("INSERT OR REPLACE INTO decrees VALUES (?, ?, ?)",[(serie,date,pdf_path) for serie in sorted(series)])
+        self._connection.executemany("INSERT OR REPLACE INTO naturalized VALUES (?, ?, ?, ?, ?, ?, ?)",rows)
+        return len(series)+len(rows)
+
+    def write_all(self, reader):
+        """Replace the decrees and naturalized persons as a whole (e.g. after a reindex), within one transaction."""
+        rows = [(rec.year,rec.serie,rec.dossier,rec.name,rec.date,rec.dep,rec.country) for rec in reader.naturalized]
+        with self._connection:
+            self._connection.execute("DELETE FROM naturalized")
+            self._connection.executemany("INSERT OR REPLACE INTO decrees VALUES (?, ?, ?)",[(serie,date,path) for serie,dates in reader.decrees.items() for date,path in dates.items()])
+            self._connection.executemany("INSERT INTO naturalized VALUES (?, ?, ?, ?, ?, ?, ?)",rows)
+        metrics.count("rows_written",len(rows))
+
+    def close(self):
+        """Close the connection to the database."""
+        self._connection.close()
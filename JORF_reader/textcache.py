@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import zlib
+import lzma
+import codecs
+from collections.abc import MutableMapping
+from .locking import atomic_write
+
+# Compression of the decree strings: (module, file extension)
+CODECS = {"zlib":(zlib,".zlib"),"lzma":(lzma,".xz")}
+INDEX = "index.json"
+
+class TextCache(MutableMapping):
+    """The cache of the decree strings, one compressed file per decree."""
+    def __init__(self, cache_path:str, compression:str="zlib"):
+        """Initialize the decree strings cache
+
+        Each decree string is stored compressed in its own file of the cache
+        folder, and a small index gives the file of each decree date. Only the
+        index is loaded, the decree strings are read when asked for, so this
+        mapping can replace the decrees string dictionary without loading all
+        the decrees. New decree strings are kept in memory until saved.
+
+        Arguments
+        ----------
+        cache_path : str, required.
+            Path to the folder of the cache (created if not found).
+
+        Keyword Arguments
+        ------------------
+        compression : str, optional.
+            By default "zlib".
+            Compression of the new decree strings, "zlib" or "lzma".
+
+        Example
+        -------
+        >>> cache = TextCache(r"results\\decrees_string")
+        >>> decree_string = cache["23/06/2021"]
+        """
+        if compression not in CODECS:
+            raise ValueError(f"Unknown compression {compression}, use one of {list(CODECS)}")
+        self._cache_path = cache_path
+        self._compression = compression
+        self._file_index = os.path.join(cache_path,INDEX)
+        if os.path.isfile(self._file_index):
+            with codecs.open(self._file_index, encoding='utf-8') as f:
+                self._index = json.load(f)
+        else:
+            self._index = {}
+        self._pending = {}
+        # Last decree string read (a decree is usually read several times in a row)
+        self._last = (None,None)
+
+    def __getitem__(self, date:str) -> str:
+        if date in self._pending:
+            return self._pending[date]
+        if self._last[0] == date:
+            return self._last[1]
+        entry = self._index[date]
+        with open(os.path.join(self._cache_path,entry["file"]),"rb") as f:
+            decree_string = CODECS[entry["compression"]][0].decompress(f.read()).decode("utf-8")
+        self._last = (date,decree_string)
+        return decree_string
+
+    def __setitem__(self, date:str, decree_string:str):
+        self._pending[date] = decree_string
+        if self._last[0] == date:
+            self._last = (None,None)
+
+    def __delitem__(self, date:str):
+        if date not in self:
+            raise KeyError(date)
+        self._pending.pop(date,None)
+        if self._last[0] == date:
+            self._last = (None,None)
+        entry = self._index.pop(date,None)
+        if entry is not None:
+            os.remove(os.path.join(self._cache_path,entry["file"]))
+            self._save_index()
+
+    def __contains__(self, date:str) -> bool:
+        return (date in self._pending) or (date in self._index)
+
+    def __iter__(self):
+        yield from self._index
+        for date in self._pending:
+            if date not in self._index:
+                yield date
+
+    def __len__(self) -> int:
+        return len(self._index)+len([date for date in self._pending if date not in self._index])
+
+    @staticmethod
+    def _file_name(date:str, extension:str) -> str:
+        """File name of a decree string (dd/mm/YYYY dates are written YYYY-mm-dd)."""
+        return "-".join(reversed(date.split("/")))+extension
+
+    def _save_index(self):
+        with atomic_write(self._file_index) as f:
+            json.dump(self._index, f, ensure_ascii=False)
+
+    def save(self):
+        """Write the new decree strings and the index to the cache folder."""
+        if not self._pending:
+            return
+        if not os.path.isdir(self._cache_path):
+            os.makedirs(self._cache_path)
+        module,extension = CODECS[self._compression]
+        for date,decree_string in self._pending.items():
+            file_name = self._file_name(date,extension)
+            with atomic_write(os.path.join(self._cache_path,file_name),"wb") as f:
+                f.write(module.compress(decree_string.encode("utf-8")))
+            old = self._index.get(date)
+            if (old is not None) and (old["file"] != file_name):
+                os.remove(os.path.join(self._cache_path,old["file"]))
+            self._index[date] = {"file":file_name,"compression":self._compression,"length":len(decree_string)}
+        self._pending.clear()
+        self._save_index()
@@ -0,0 +1,204 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the ingestion and lookup of the JORF reader.
+
+Writes a folder of synthetic JOs (see benchmarks.synthetic) and times the
+following scenarios, reporting throughput and peak memory of each:
+
+- cold_load: new Python process importing JORF_reader and creating a Reader
+  on results already saved, then looking for one person.
+- cold_snapshot: same as cold_load, the person being looked for in the
+  snapshot of the results (see Reader.publish_snapshot).
+- single_pdf: reading one JO pdf file (date, decree string and persons).
+- ingest_folder: ingesting the whole folder into empty results.
+- all_series: parsing the persons of all the decree strings for all the series.
+- lookup_exact, lookup_substring, lookup_fuzzy: looking for many persons at once.
+
+Timings are the best of the repeats. Peak memory is measured on a separate
+run with tracemalloc (Python allocations of the benchmark process), except for
+cold_load and cold_snapshot which report the maximum resident size of the new process. A
+previous json report can be given as baseline, the run then fails if the
+throughput of a scenario drops by more than the tolerance.
+
+Example
+-------
+>>> python -m benchmarks.run --jos 10 --persons 800 --report bench.json
+>>> python -m benchmarks.run --jos 10 --persons 800 --baseline bench.json --tolerance 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import random
+import shutil
+import argparse
+import tempfile
+import platform
+import subprocess
+import tracemalloc
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_folder
+from JORF_reader import Reader
+from JORF_reader.JORF_reader import SERIES, _read_jo
+from JORF_reader.records import split_name
+
+COLD_LOAD = """
+import sys, time, resource
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from JORF_reader import Reader
+reader = Reader(JOs_path=sys.argv[2], save_path=sys.argv[3], snapshot=sys.argv[6] if len(sys.argv) > 6 else None)
+reader.search_person(first_name=sys.argv[4], last_name=sys.argv[5], know_series=False)
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def _quiet(function, *args, **kwargs):
+    """Call a function without the progress logged by the Reader (warnings are still logged)."""
+    logging.disable(logging.INFO)
+    try:
+        return function(*args,**kwargs)
+    finally:
+        logging.disable(logging.NOTSET)
+
+def measure(function, repeat:int=3, memory:bool=True) -> tuple:
+    """Time a function and measure its peak memory.
+
+    Arguments
+    ----------
+    function : Callable, required.
+        Function without arguments, returning the number of items processed.
+
+    Keyword Arguments
+    ------------------
+    repeat : int, optional.
+        By default 3.
+        Number of timed runs (the best one is kept).
+
+    memory : bool, optional.
+        By default True.
+        Runs the function once more with tracemalloc to get the peak memory.
+
+    Returns
+    -------
+    tuple:
+        Best time (s), number of items and peak memory (bytes, None if not measured).
+    """
+    best,items = None,0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = function()
+        elapsed = time.perf_counter()-start
+        best = elapsed if best is None else min(best,elapsed)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best,items,peak
+
+def run(args:argparse.Namespace) -> dict:
+    """Run all the scenarios and get the report."""
+    work = tempfile.mkdtemp(prefix="jorf_bench_")
+    JOs_path = os.path.join(work,"JOs")
+    paths = make_folder(JOs_path,jos=args.jos,decrees=args.decrees,persons=args.persons,pages=args.pages,seed=args.seed,
+                        irrelevant=args.irrelevant,outline=args.outline)
+    results = {}
+    def record(name:str, unit:str, timing:tuple):
+        elapsed,items,peak = timing
+        results[name] = {"seconds":elapsed,"items":items,"unit":unit,"throughput":items/elapsed if elapsed else None,"peak_memory":peak}
+        memory = "" if peak is None else f", peak {peak/2**20:.1f} MiB"
+        print(f"{name:<18} {elapsed:8.3f} s  {items/elapsed if elapsed else 0:12.1f} {unit}/s{memory}")
+    try:
+        # Reading of a single JO
+        record("single_pdf","persons",measure(lambda: len(_read_jo(paths[0])[3]),args.repeat))
+        # Ingestion of the whole folder into empty results
+        counter = iter(range(10**6))
+        def ingest():
+            save_path = os.path.join(work,f"ingest_{next(counter)}")
+            _quiet(Reader,JOs_path=JOs_path,save_path=save_path,workers=args.workers)
+            shutil.rmtree(save_path)
+            return len(paths)
+        record("ingest_folder","JOs",measure(ingest,args.repeat))
+        # Results kept for the other scenarios
+        save_path = os.path.join(work,"results")
+        reader = _quiet(Reader,JOs_path=JOs_path,save_path=save_path,workers=args.workers)
+        dates = list(reader.mega_string.keys())
+        def all_series():
+            return sum(sum(_quiet(reader.extract_persons,date,series=SERIES).values()) for date in dates)
+        record("all_series","persons",measure(all_series,args.repeat))
+        # Lookups of persons known (with their names) and unknown
+        records = list(reader.naturalized)
+        rnd = random.Random(args.seed)
+        people = [split_name(rnd.choice(records).name)[::-1] for _ in range(args.lookups)]
+        people += [("Inconnu","PERSONNE INTROUVABLE")]*(args.lookups//10)
+        reader.naturalized.index
+        for mode in ("exact","substring"):
+            record(f"lookup_{mode}","lookups",measure(lambda: len(reader.search_people(people,mode=mode)),args.repeat))
+        fuzzy = [(first,last[:-1]+"X") for first,last in people[:max(args.lookups//10,1)]]
+        record("lookup_fuzzy","lookups",measure(lambda: len(reader.search_people(fuzzy,fuzzy=True)),args.repeat))
+        # New process on the results saved
+        first,last = people[0]
+        file_snapshot = _quiet(reader.publish_snapshot)
+        for name,snapshot in (("cold_load",[]),("cold_snapshot",[file_snapshot])):
+            def cold_load():
+                out = subprocess.run([sys.executable,"-c",COLD_LOAD,os.path.dirname(os.path.dirname(os.path.abspath(__file__))),JOs_path,save_path,first,last]+snapshot,
+                                     capture_output=True,text=True,check=True).stdout.split()
+                cold_load.maxrss = int(out[-1])*(1 if sys.platform == "darwin" else 1024)
+                return 1
+            elapsed,items,_ = measure(cold_load,args.repeat,memory=False)
+            record(name,"loads",(elapsed,items,cold_load.maxrss))
+    finally:
+        shutil.rmtree(work,ignore_errors=True)
+    return {"python":platform.python_version(),"platform":platform.platform(),
+            "parameters":{key:getattr(args,key) for key in ("jos","decrees","persons","pages","irrelevant","outline","lookups","workers","repeat","seed")},
+            "scenarios":results}
+
+def compare(report:dict, baseline:dict, tolerance:float) -> list:
+    """Get the scenarios whose throughput dropped by more than tolerance from the baseline."""
+    slower = []
+    for name,result in report["scenarios"].items():
+        before = baseline.get("scenarios",{}).get(name)
+        if (before is None) or (not before.get("throughput")) or (result["throughput"] is None):
+            continue
+        ratio = result["throughput"]/before["throughput"]
+        print(f"{name:<18} {ratio:6.2f}x baseline")
+        if ratio < 1-tolerance:
+            slower.append(name)
+    return slower
+
+def main(argv:list=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the ingestion and lookup of the JORF reader on synthetic JOs.")
+    parser.add_argument("--jos",type=int,default=5,help="number of JOs of the folder")
+    parser.add_argument("--decrees",type=int,default=2,help="number of decrees of each JO")
+    parser.add_argument("--persons",type=int,default=400,help="number of persons of each JO")
+    parser.add_argument("--pages",type=int,default=None,help="number of pages of each JO (other texts after the decrees)")
+    parser.add_argument("--irrelevant",type=int,default=0,help="number of JOs without naturalization added to the folder")
+    parser.add_argument("--outline",action="store_true",help="JOs written with an outline")
+    parser.add_argument("--lookups",type=int,default=1000,help="number of persons looked for")
+    parser.add_argument("--workers",type=int,default=1,help="number of processes of the ingestion")
+    parser.add_argument("--repeat",type=int,default=3,help="number of timed runs of each scenario")
+    parser.add_argument("--seed",type=int,default=0,help="seed of the synthetic JOs")
+    parser.add_argument("--report",default=None,help="json file where the report is written")
+    parser.add_argument("--baseline",default=None,help="json report of a previous run to compare with")
+    parser.add_argument("--tolerance",type=float,default=0.2,help="drop of throughput allowed from the baseline")
+    args = parser.parse_args(argv)
+    report = run(args)
+    if args.report:
+        with open(args.report,"w",encoding="utf-8") as f:
+            json.dump(report,f,indent=2)
+    if args.baseline:
+        with open(args.baseline,encoding="utf-8") as f:
+            slower = compare(report,json.load(f),args.tolerance)
+        if slower:
+            print("Slower than the baseline:",", ".join(slower))
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
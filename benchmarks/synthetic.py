@@ -0,0 +1,204 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Synthetic JOs for the benchmarks.
+
+The JOs are written as plain pdf files (Helvetica text only) with the layout
+the parser expects: the date header and the list of the naturalization
+decrees on the title page, then pages with the running title of the JOs
+(date, "JOURNAL OFFICIEL DE LA RÉPUBLIQUE FRANÇAISE", "Texte n sur N") and one
+"Décret du ... NOR" block per decree ("Par décret du ..., sont naturalisés
+français :" before its persons) with persons written as "LAST (First), né le
+... à Town (Country), NAT, 2020X nnnddd, dép. 0dd." and the announcements (or
+ISSN) marker after the decrees.
+"""
+
+import os
+import random
+from datetime import date, timedelta
+
+MONTHS = ["janvier","février","mars","avril","mai","juin","juillet","août","septembre","octobre","novembre","décembre"]
+DAYS = ["Lundi","Mardi","Mercredi","Jeudi","Vendredi","Samedi","Dimanche"]
+SYLLABLES = ["ba","di","lo","ma","nu","ka","ri","sa","to","ve","lar","ben","ngu","al","ou","za","mi","che","dra","gon"]
+FIRST_NAMES = ["Awa","Alejandro","Pierre, Emmanuel","Mohamed","Léa","Fatou","Nguyen Van","Olga","Karim","Ana María","Yusuf","Mei"]
+TOWNS = ["Alger","Paris","Mexico","Dakar","Hanoï","Casablanca","Kiev","Bamako","Lyon","Tunis"]
+COUNTRIES = ["Mexique","Maroc","Côte d’Ivoire","Algérie","Sénégal","Viêt Nam","Ukraine","Mali","Tunisie","75","69"]
+SERIES = [f"{ser:03}" for ser in list(range(0,55))+[300,301,302,303,304,305]]
+# Text lines written on each page after the title page
+LINES_PER_PAGE = 60
+
+def _escape(text:str) -> bytes:
+    return text.replace("\\","\\\\").replace("(","\\(").replace(")","\\)").encode("cp1252")
+
+def write_pdf(pdf_path:str, pages:list, outline:list=None):
+    """Write a pdf file of text lines.
+
+    Arguments
+    ----------
+    pdf_path : str, required.
+        Path to the pdf file.
+
+    pages : list, required.
+        For each page, the list of (x, y, font size, text) of its lines.
+
+    Keyword Arguments
+    ------------------
+    outline : list, optional.
+        By default None.
+        Entries (title, page index starting at 0) of the outline of the file.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R%s >>" % (b" /Outlines %d 0 R" % (len(pages)*2+4) if outline else b""),None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for lines in pages:
+        stream = b"\n".join(b"BT /F1 %d Tf %d %d Td (" % (size,x,y)+_escape(text)+b") Tj ET" for x,y,size,text in lines)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream)+stream+b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids),len(kids))
+    if outline:
+        # Root of the outline followed by its entries
+        root = len(objects)+1
+        objects.append(b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>" % (root+1,root+len(outline),len(outline)))
+        for i,(title,page) in enumerate(outline):
+            links = (b" /Prev %d 0 R" % (root+i) if i else b"")+(b" /Next %d 0 R" % (root+i+2) if i < len(outline)-1 else b"")
+            objects.append(b"<< /Title (" + _escape(title) + b") /Parent %d 0 R%s /Dest [%d 0 R /Fit] >>" % (root,links,kids[page]))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i,obj in enumerate(objects):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (i+1)+obj+b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects)+1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects)+1,xref)
+    with open(pdf_path,"wb") as f:
+        f.write(bytes(out))
+
+def last_name(rnd:random.Random) -> str:
+    """Random last name of one or two words."""
+    words = ["".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2,4))).upper() for _ in range(rnd.choice([1,1,1,2]))]
+    return " ".join(words)
+
+def person_line(rnd:random.Random, series:list=SERIES, years:list=("2020",)) -> str:
+    """Random person of a naturalization decree."""
+    serie,dossier = rnd.choice(series),f"{rnd.randrange(1000):03}"
+    born = "née" if rnd.random() < 0.5 else "né"
+    return (f"{last_name(rnd)} ({rnd.choice(FIRST_NAMES)}), {born} le {rnd.randint(1,28):02}/{rnd.randint(1,12):02}/{rnd.randint(1950,2005)} "
+            f"à {rnd.choice(TOWNS)} ({rnd.choice(COUNTRIES)}), NAT, {rnd.choice(years)}X {serie}{dossier}, dép. 0{rnd.randrange(10,95)}.")
+
+def decree_lines(day:int, month:int, year:int, decrees:int, persons:int, rnd:random.Random, series:list=SERIES, years:list=("2020",)) -> list:
+    """Lines of the naturalization decrees of a JO (persons shared between the decrees)."""
+    lines = []
+    for decree in range(decrees):
+        lines.append(f"Décret du {max(day-2,1)} {MONTHS[month-1]} {year} portant naturalisation, réintégration NOR : INTN{year%100}{decree:05}D")
+        lines.append(f"Par décret du {max(day-2,1)} {MONTHS[month-1]} {year}, sont naturalisés français :")
+        for _ in range(persons//decrees+(decree < persons%decrees)):
+            lines.append(person_line(rnd,series,years))
+    return lines
+
+def make_text(decrees:int=2, persons:int=400, seed:int=0, series:list=SERIES, years:list=("2020",)) -> str:
+    """Decree string (as given by Reader.get_decree_string) of a synthetic JO."""
+    rnd = random.Random(seed)
+    return " ".join(decree_lines(23,6,2021,decrees,persons,rnd,series,years))
+
+def make_jo(pdf_path:str, day:int=23, month:int=6, year:int=2021, decrees:int=2, persons:int=400, pages:int=None,
+            seed:int=0, series:list=SERIES, years:list=("2020",), annonces:bool=True, outline:bool=False):
+    """Write a synthetic JO pdf file.
+
+    Arguments
+    ----------
+    pdf_path : str, required.
+        Path to the pdf file.
+
+    Keyword Arguments
+    ------------------
+    day, month, year : int, optional.
+        By default 23/06/2021.
+        Date of the JO.
+
+    decrees : int, optional.
+        By default 2.
+        Number of naturalization decrees (a JO without naturalization if 0).
+
+    persons : int, optional.
+        By default 400.
+        Number of persons (all decrees together).
+
+    pages : int, optional.
+        By default None.
+        Number of pages. Pages of other texts are added after the decrees if
+        more pages than needed are asked for.
+
+    seed : int, optional.
+        By default 0.
+        Seed of the random persons.
+
+    series : list, optional.
+        By default all the series.
+        Series of the dossiers.
+
+    years : list, optional.
+        By default ("2020",).
+        Years of the dossier prefixes.
+
+    annonces : bool, optional.
+        By default True.
+        The announcements follow the decrees (otherwise the end of the JO).
+
+    outline : bool, optional.
+        By default False.
+        Writes the outline of the JO (one entry per decree, and the other texts).
+    """
+    rnd = random.Random(seed)
+    header = f"{DAYS[(day-1)%7]} {'1er' if day == 1 else day} {MONTHS[month-1]} {year} / JOURNAL OFFICIEL DE LA RÉPUBLIQUE FRANÇAISE"
+    title = [(50,800,9,header),(50,760,9,"Sommaire")]
+    if decrees:
+        title.append((50,720,9,"Naturalisations et réintégrations"))
+    y = 690
+    for _ in range(decrees):
+        title.append((50,y,9,f"Décret du {max(day-2,1)} {MONTHS[month-1]} {year} portant naturalisation, réintégration"))
+        y -= 30
+    if annonces:
+        title.append((50,y-20,9,"Annonces"))
+    lines = decree_lines(day,month,year,decrees,persons,rnd,series,years) if decrees else []
+    # Index of the first line of each decree, and of the text after them
+    starts = [i for i,line in enumerate(lines) if line.startswith("Décret du ")]+[len(lines)]
+    lines.append("Les annonces sont reçues à la direction de l’information légale et administrative" if annonces else "ISSN 0373-0425")
+    while (pages is not None) and (len(lines) < (pages-1)*LINES_PER_PAGE):
+        lines.append(f"Avis de concours et de vacance d'emplois {len(lines)}, ministère de l'intérieur.")
+    pdf_pages = [title]
+    for start in range(0,len(lines),LINES_PER_PAGE):
+        # Running title of the page as laid out in the JOs: date, title and
+        # number of the text (one per decree, then the other texts)
+        text = sum(first <= start for first in starts[:-1]) if start < starts[-1] else decrees+1
+        page = [(40,810,8,f"{'1er' if day == 1 else day} {MONTHS[month-1]} {year}"),(200,810,8,"JOURNAL OFFICIEL DE LA RÉPUBLIQUE FRANÇAISE"),
+                (480,810,8,f"Texte {text} sur {decrees+1}")]
+        page.extend((40,790-12*i,7,line) for i,line in enumerate(lines[start:start+LINES_PER_PAGE]))
+        pdf_pages.append(page)
+    entries = [(lines[start][:lines[start].index(" NOR")] if start < starts[-1] else "Avis divers",1+start//LINES_PER_PAGE) for start in starts]
+    write_pdf(pdf_path,pdf_pages,entries if outline else None)
+
+def make_folder(JOs_path:str, jos:int=5, decrees:int=2, persons:int=400, pages:int=None, seed:int=0, years:list=("2020",),
+                irrelevant:int=0, outline:bool=False) -> list:
+    """Write a folder of synthetic JOs (one every day from 1st of January 2021).
+
+    The JOs with naturalization decrees are followed by the irrelevant ones
+    (JOs without naturalization, of the same number of pages).
+
+    Returns
+    -------
+    list:
+        Paths of the pdf files written.
+    """
+    if not os.path.isdir(JOs_path):
+        os.makedirs(JOs_path)
+    paths = []
+    for i in range(jos+irrelevant):
+        day = date(2021,1,1)+timedelta(days=i)
+        pdf_path = os.path.join(JOs_path,f"joe_{day.strftime('%Y%m%d')}.pdf")
+        make_jo(pdf_path,day=day.day,month=day.month,year=day.year,decrees=decrees if i < jos else 0,persons=persons,
+                pages=pages or 2+persons//LINES_PER_PAGE if i >= jos else pages,seed=seed+i,years=years,annonces=bool(i%2),outline=outline)
+        paths.append(pdf_path)
+    return paths
@@ -0,0 +1,32 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Fixtures of the tests, built on the synthetic JOs of the benchmarks (see benchmarks.synthetic)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_folder
+from JORF_reader import Reader
+
+@pytest.fixture
+def jos(tmp_path) -> list:
+    """Paths of a folder of 3 synthetic JOs with naturalization decrees and 1 without."""
+    return make_folder(str(tmp_path/"JOs"),jos=3,decrees=2,persons=60,years=("2019","2020"),irrelevant=1)
+
+@pytest.fixture
+def reader(tmp_path):
+    """Make Readers on the results folder of the test, the JOs being ingested by the tests only."""
+    def make(**kwargs) -> Reader:
+        kwargs.setdefault("save_path",str(tmp_path/"results"))
+        # No JOs folder by default, so that nothing is ingested when created
+        kwargs.setdefault("JOs_path",str(tmp_path/"no_JOs"))
+        return Reader(**kwargs)
+    return make
+
+def persons(reader:Reader) -> list:
+    """Persons of the results of a Reader, sorted."""
+    return sorted((rec.year,rec.serie,rec.dossier,rec.name,rec.date,rec.dep,rec.country) for rec in reader.naturalized)
@@ -0,0 +1,41 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from conftest import persons
+from JORF_reader.locking import ResultsLock, atomic_write
+
+def test_atomic_write_failed(tmp_path):
+    file_path = str(tmp_path/"info.json")
+    with atomic_write(file_path) as f:
+        f.write("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(file_path) as f:
+            f.write("new")
+            raise RuntimeError("interrupted")
+    with open(file_path,encoding="utf-8") as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["info.json"]
+
+def test_generation(tmp_path):
+    lock = ResultsLock(str(tmp_path))
+    assert lock.generation() == 0
+    with lock.write() as found:
+        assert found == 0
+        assert lock.locked and (lock.generation() % 2 == 1)
+    assert (not lock.locked) and (lock.generation() == 2)
+
+def test_two_readers(reader, jos):
+    first,second = reader(),reader()
+    # Both loaded before any ingest
+    assert first.count == second.count == 0
+    assert len(first.ingest(jos[:2])) == 2
+    assert len(second.ingest(jos)) == 1
+    # The results of the first were loaded again by the second before its merge
+    assert len(persons(second)) == len(persons(first))+60
+    assert persons(reader()) == persons(second)
+    assert first.refresh()
+    assert persons(first) == persons(second)
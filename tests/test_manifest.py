@@ -0,0 +1,52 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+
+from conftest import persons
+from JORF_reader import JORF_reader
+from JORF_reader.manifest import Manifest, STAGES, file_digest
+
+def read_jo(pdf_path:str, **kwargs):
+    raise AssertionError(f"{pdf_path} read again")
+
+def test_skip(tmp_path, jos):
+    file_manifest = str(tmp_path/"manifest.json")
+    manifest = Manifest(file_manifest,parser_version="1",probe_version="1")
+    digest = manifest.identify(jos[-1])
+    manifest.skip(digest,jos[-1],None)
+    manifest.save()
+    assert Manifest(file_manifest,parser_version="2",probe_version="1").missing_stages(digest) == []
+    # Probed again once the probe changed
+    assert Manifest(file_manifest,parser_version="1",probe_version="2").missing_stages(digest) == list(STAGES)
+
+def test_rename(tmp_path, jos):
+    manifest = Manifest(str(tmp_path/"manifest.json"),parser_version="1")
+    digest = manifest.identify(jos[0])
+    manifest.record(digest,jos[0],"01/01/2021","text")
+    renamed = jos[0]+".renamed.pdf"
+    os.rename(jos[0],renamed)
+    assert manifest.known(renamed) is None
+    assert manifest.identify(renamed) == digest
+    assert manifest.known(renamed) == digest
+    assert manifest.get(digest)["path"] == renamed
+
+def test_ingest_once(reader, jos):
+    first = reader()
+    assert len(first.ingest(jos)) == 3
+    os.rename(jos[0],jos[0]+".renamed.pdf")
+    again = reader()
+    assert again.ingest([jos[0]+".renamed.pdf"]+jos[1:]) == []
+    assert persons(again) == persons(first)
+
+def test_parser_bump(reader, jos, monkeypatch):
+    first = reader()
+    first.ingest(jos)
+    monkeypatch.setattr(JORF_reader,"PARSER_VERSION",str(int(JORF_reader.PARSER_VERSION)+1))
+    bumped = reader()
+    # Parsed again from the decree strings known, without reading the pdf files
+    monkeypatch.setattr(JORF_reader,"_read_jo",read_jo)
+    assert len(bumped.ingest(jos)) == 3
+    assert persons(bumped) == persons(first)
+    assert all(entry.get("parser_version") == JORF_reader.PARSER_VERSION for entry in bumped.manifest.entries.values() if entry.get("decrees") != 0)
+    assert file_digest(jos[0]) in bumped.manifest
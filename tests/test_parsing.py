@@ -0,0 +1,34 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from benchmarks.synthetic import make_text
+from JORF_reader import Reader, parse_person_records
+from JORF_reader.JORF_reader import PATTERN_PERSON
+
+def split_persons(decree_string:str) -> list:
+    """Persons as parsed before parse_person_records (each person matched by PATTERN_PERSON split by parts)."""
+    persons = []
+    for match in PATTERN_PERSON.finditer(decree_string):
+        person = Reader._parse_person("".join(match.groups()))
+        if person is not None:
+            persons.append(person)
+    return persons
+
+@pytest.mark.parametrize("seed",range(3))
+def test_records_as_split(seed):
+    decree_string = make_text(decrees=3,persons=300,seed=seed,years=("2019","2020"))
+    records = [(rec.year,rec.serie,rec.dossier,rec.name,rec.dep,rec.country) for rec in parse_person_records(decree_string)]
+    assert len(records) == 300
+    assert records == split_persons(decree_string)
+
+def test_records_birth():
+    record = next(parse_person_records(make_text(decrees=1,persons=1)))
+    assert record.birth_date.count("/") == 2
+    assert record.birthplace and record.date is None
+
+def test_persons_by_pieces():
+    decree_string = make_text(decrees=2,persons=200,seed=1)
+    pieces = [decree_string[start:start+997] for start in range(0,len(decree_string),997)]
+    assert list(Reader.iter_persons(pieces)) == Reader.parse_persons(decree_string)
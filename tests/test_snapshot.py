@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from JORF_reader.records import NameIndex, split_name
+from JORF_reader.snapshot import NaturalizedSnapshot
+
+def keys(records:list) -> list:
+    return sorted((rec.year,rec.serie,rec.dossier,rec.name) for rec in records)
+
+@pytest.fixture
+def published(reader, jos) -> tuple:
+    """Reader of the results of the JOs, and snapshot of its persons."""
+    written = reader()
+    written.ingest(jos)
+    snapshot = NaturalizedSnapshot(written.publish_snapshot())
+    yield written,snapshot
+    snapshot.close()
+
+@pytest.mark.parametrize("mode",["exact","prefix","substring"])
+def test_search(published, mode):
+    written,snapshot = published
+    index = NameIndex(written.naturalized)
+    for record in list(written.naturalized)[::7]:
+        last,first = split_name(record.name)
+        if mode != "exact":
+            last,first = last[1:4] if mode == "substring" else last[:3],first[:2]
+        expected = keys(index.search(last_name=last,first_name=first,mode=mode))
+        assert record.name in [key[3] for key in expected] or mode == "substring"
+        assert keys(snapshot.search(last_name=last,first_name=first,mode=mode)) == expected
+        assert keys(snapshot.search(last_name=last,mode=mode,serie=record.serie,year=record.year)) == keys(index.search(last_name=last,mode=mode,serie=record.serie,year=record.year))
+
+def test_fuzzy_search(published):
+    written,snapshot = published
+    index = NameIndex(written.naturalized)
+    for record in list(written.naturalized)[::11]:
+        last,first = split_name(record.name)
+        for query in (last,last[:2]+("X" if last[2] != "X" else "Y")+last[3:],last+"E"):
+            found = snapshot.fuzzy_search(last_name=query,first_name=first)
+            assert [(keys([rec]),distance) for rec,distance in found] == [(keys([rec]),distance) for rec,distance in index.fuzzy_search(last_name=query,first_name=first)]
+        assert (record,0) in index.fuzzy_search(last_name=last,first_name=first)
+
+def test_snapshot_reader(published, reader):
+    written,snapshot = published
+    lookups = reader(snapshot=written.publish_snapshot())
+    record = next(iter(written.naturalized))
+    last,first = split_name(record.name)
+    assert lookups.search_person(first_name=first,last_name=last,know_series=False) == written.search_person(first_name=first,last_name=last,know_series=False)
+    assert lookups.count == written.count
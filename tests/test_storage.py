@@ -0,0 +1,33 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from conftest import persons
+from JORF_reader.storage import SQLiteStorage
+
+def results(reader) -> tuple:
+    """Persons, decrees and decree strings of the results of a Reader."""
+    return persons(reader),reader.decrees,dict(reader.mega_string)
+
+def test_sqlite_round_trip(reader, jos):
+    written = reader(storage="sqlite")
+    assert len(written.ingest(jos)) == 3
+    loaded = reader(storage="sqlite")
+    assert isinstance(loaded._storage,SQLiteStorage)
+    assert results(loaded) == results(written)
+    assert loaded.count == written.count > 0
+
+def test_sqlite_same_as_json(tmp_path, reader, jos):
+    json_reader = reader(save_path=str(tmp_path/"json"))
+    json_reader.ingest(jos)
+    sqlite_reader = reader(save_path=str(tmp_path/"sqlite"),storage="sqlite")
+    sqlite_reader.ingest(jos)
+    assert results(sqlite_reader) == results(json_reader)
+
+def test_import_json(reader, jos):
+    json_reader = reader()
+    json_reader.ingest(jos)
+    imported = reader(storage="sqlite")
+    assert results(imported) == results(json_reader)
+    # Read from the database once imported
+    assert imported.ingest(jos) == []
+    assert results(reader(storage="sqlite")) == results(json_reader)
@@ -0,0 +1,40 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import shutil
+
+from benchmarks.synthetic import make_jo
+from conftest import persons
+
+def test_watch_merge(tmp_path, reader):
+    JOs_path = str(tmp_path/"JOs")
+    os.makedirs(JOs_path)
+    watching = reader(JOs_path=JOs_path)
+
+    async def watch() -> tuple:
+        stop,merged = asyncio.Event(),asyncio.Event()
+        found = []
+
+        def on_merge(date:str, pdf_path:str):
+            found.append((date,os.path.basename(pdf_path)))
+            merged.set()
+
+        task = asyncio.create_task(watching.watch(interval=0.05,stop=stop,on_merge=on_merge))
+        await asyncio.sleep(0.1)
+        # Written elsewhere then moved, so that it lands complete
+        make_jo(str(tmp_path/"joe.pdf"),day=25,persons=40)
+        shutil.move(str(tmp_path/"joe.pdf"),os.path.join(JOs_path,"joe.pdf"))
+        await asyncio.wait_for(merged.wait(),30)
+        # Looked for while watching
+        looked = len(watching.naturalized)
+        stop.set()
+        return await task,found,looked
+
+    dates,found,looked = asyncio.run(watch())
+    assert dates == ["25/06/2021"]
+    assert found == [("25/06/2021","joe.pdf")]
+    assert looked == 40
+    # Saved for the other Readers
+    assert persons(reader()) == persons(watching)